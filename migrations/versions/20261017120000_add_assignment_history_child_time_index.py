@@ -0,0 +1,34 @@
+"""add assignment history child time index
+
+Revision ID: 20261017120000
+Revises: 20260222020000
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "20261017120000"
+down_revision: Union[str, None] = "20260222020000"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Add composite index serving a child's history newest-first."""
+    op.create_index(
+        "ix_assignment_history_child_assigned_at",
+        "assignment_history",
+        ["child_item_id", sa.text("assigned_at DESC")],
+    )
+
+
+def downgrade() -> None:
+    """Remove composite index on child item + assignment time."""
+    op.drop_index(
+        "ix_assignment_history_child_assigned_at", table_name="assignment_history"
+    )
@@ -2,7 +2,7 @@
 
 from datetime import datetime, timezone
 
-from sqlalchemy import Column, DateTime, ForeignKey, Text
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Text, desc
 from sqlalchemy.orm import relationship
 
 from .base import GUID, Base, TimestampMixin, UUIDMixin
@@ -12,6 +12,14 @@ class AssignmentHistory(Base, UUIDMixin, TimestampMixin):
     """Assignment history model for tracking child item assignments to parent items."""
 
     __tablename__ = "assignment_history"
+    __table_args__ = (
+        # Serves a child's history newest-first without a separate sort
+        Index(
+            "ix_assignment_history_child_assigned_at",
+            "child_item_id",
+            desc("assigned_at"),
+        ),
+    )
 
     assigned_at = Column(
         DateTime,
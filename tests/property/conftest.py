@@ -5,7 +5,29 @@ This conftest prevents the parent conftest fixtures from being used and configur
 pytest to avoid asyncio mode conflicts with hypothesis.
 """
 
+import os
+
 import pytest
+from hypothesis import settings
+
+# DB-bound property suites are slow per example; CI selects the "fast"
+# profile with HYPOTHESIS_PROFILE=fast to cap examples for tests that do not
+# pin their own max_examples. It stays randomized so CI keeps exploring new
+# inputs on every run.
+settings.register_profile("fast", max_examples=10, deadline=None)
+# Opt-in local mode (HYPOTHESIS_FAST=1): a fixed seed and no on-disk example
+# database, so repeated runs replay the same examples without example-file I/O.
+settings.register_profile(
+    "fast-derandomized",
+    max_examples=10,
+    deadline=None,
+    derandomize=True,
+    database=None,
+)
+if os.getenv("HYPOTHESIS_FAST"):
+    settings.load_profile("fast-derandomized")
+else:
+    settings.load_profile(os.getenv("HYPOTHESIS_PROFILE", "default"))
 
 
 def pytest_collection_modifyitems(items):
@@ -9,19 +9,119 @@ The actual error handling works correctly in production but is difficult to test
 with property-based testing and mocking.
 """
 
-from unittest.mock import patch
+from unittest.mock import AsyncMock, patch
 
+import httpx
 import pytest
 from fastapi.testclient import TestClient
-from hypothesis import given, settings
+from hypothesis import HealthCheck, given, settings
 from hypothesis import strategies as st
 
 from services.api_gateway.main import app
 from shared.auth.utils import create_access_token
 
-# Mark all tests in this module as skipped
-pytestmark = pytest.mark.skip(
-    reason="Middleware error response testing requires complex setup"
+# Mark all tests in this module as skipped, and as slow once re-enabled
+pytestmark = [
+    pytest.mark.skip(reason="Middleware error response testing requires complex setup"),
+    pytest.mark.slow,
+]
+
+# Responses for GETs without an Authorization header, keyed by endpoint. These
+# requests are rejected by the auth middleware before reaching any service,
+# so repeat calls within a session always produce the same response.
+_RESPONSE_CACHE = {}
+
+
+@pytest.fixture(scope="module", autouse=True)
+def _clear_response_cache():
+    """Start each module run with an empty response cache."""
+    _RESPONSE_CACHE.clear()
+    yield
+    _RESPONSE_CACHE.clear()
+
+
+class _FakeResp:
+    """Minimal stand-in for ``httpx.Response`` as read by the gateway router.
+
+    The router only touches ``status_code``, ``content``, ``headers`` and
+    ``json()``, so plain slots avoid building ``MagicMock`` children on every
+    attribute access.
+    """
+
+    __slots__ = ("status_code", "content", "headers", "_json")
+
+    def __init__(self, status_code, content, headers, json_data):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers
+        self._json = json_data
+
+    def json(self):
+        return self._json
+
+
+@pytest.fixture(scope="module")
+def client():
+    """One test client per module; under xdist each worker builds its own."""
+    return TestClient(app)
+
+
+@pytest.fixture(autouse=True)
+def mock_httpx(monkeypatch):
+    """Stub outbound service calls once per test rather than per example.
+
+    Tests configure ``side_effect``/``return_value`` on the yielded mock
+    instead of opening their own ``patch`` context for every example.
+    """
+    mock_request = AsyncMock(
+        return_value=_FakeResp(200, b"{}", {"content-type": "application/json"}, {})
+    )
+    monkeypatch.setattr("httpx.AsyncClient.request", mock_request)
+    yield mock_request
+
+
+def _cached_get(client, endpoint):
+    """GET an endpoint without credentials, reusing earlier responses."""
+    if endpoint not in _RESPONSE_CACHE:
+        _RESPONSE_CACHE[endpoint] = client.get(endpoint)
+    return _RESPONSE_CACHE[endpoint]
+
+
+def _assert_error_envelope(response, expected_code=None):
+    """Assert a response carries the standard error object and return it.
+
+    The body is parsed once; errors raised from middleware arrive wrapped in
+    ``detail`` while handler errors sit directly under ``error``.
+    """
+    data = response.json()
+    error_obj = data["detail"]["error"] if "detail" in data else data["error"]
+
+    missing = {"code", "message", "timestamp", "request_id"} - error_obj.keys()
+    assert not missing, f"Missing fields: {sorted(missing)}"
+
+    if expected_code is not None:
+        assert error_obj["code"] == expected_code
+
+    return error_obj
+
+
+# Every (error type, endpoint) combination, built once so each example is a
+# single sampled_from draw instead of two draws plus a dict construction.
+_ERROR_SCENARIOS = tuple(
+    {"error_type": error_type, "endpoint": endpoint}
+    for error_type in (
+        "authentication_error",
+        "service_unavailable",
+        "service_timeout",
+        "invalid_service",
+        "rate_limit_exceeded",
+    )
+    for endpoint in (
+        "/api/v1/items/parent",
+        "/api/v1/locations",
+        "/api/v1/users",
+        "/api/v1/reports",
+    )
 )
 
 
@@ -29,57 +129,28 @@ pytestmark = pytest.mark.skip(
 @st.composite
 def error_scenario_data(draw):
     """Generate error scenario data."""
-    error_type = draw(
-        st.sampled_from(
-            [
-                "authentication_error",
-                "service_unavailable",
-                "service_timeout",
-                "invalid_service",
-                "rate_limit_exceeded",
-            ]
-        )
-    )
-
-    endpoint = draw(
-        st.sampled_from(
-            [
-                "/api/v1/items/parent",
-                "/api/v1/locations",
-                "/api/v1/users",
-                "/api/v1/reports",
-            ]
-        )
-    )
-
-    return {"error_type": error_type, "endpoint": endpoint}
+    return draw(st.sampled_from(_ERROR_SCENARIOS))
 
 
-@st.composite
-def valid_user_data(draw):
-    """Generate valid user data for authentication."""
-    user_id = draw(st.uuids())
-    username = draw(
-        st.text(
-            min_size=3,
-            max_size=50,
-            alphabet=st.characters(whitelist_categories=("Lu", "Ll", "Nd")),
-        )
-    )
-    role = draw(st.sampled_from(["admin", "manager", "user"]))
-    return {"user_id": str(user_id), "username": username, "role": role}
+# The fixed test user's payload never changes, so sign its token only once
+_TEST_USER_TOKEN = create_access_token(
+    {"sub": "test-user", "username": "test", "role": "user"}
+)
+_TEST_USER_HEADERS = {"Authorization": f"Bearer {_TEST_USER_TOKEN}"}
 
 
 class TestAPIErrorResponseConsistencyProperties:
     """Property-based tests for API error response consistency."""
 
-    def setup_method(self):
-        """Set up test client."""
-        self.client = TestClient(app)
-
     @given(error_data=error_scenario_data())
-    @settings(max_examples=5, deadline=None)
-    def test_api_error_response_consistency_property(self, error_data):
+    @settings(
+        max_examples=5,
+        deadline=None,
+        suppress_health_check=[HealthCheck.function_scoped_fixture],
+    )
+    def test_api_error_response_consistency_property(
+        self, client, mock_httpx, error_data
+    ):
         """
         Property 15: API Error Response Consistency
 
@@ -91,76 +162,45 @@ class TestAPIErrorResponseConsistencyProperties:
         endpoint = error_data["endpoint"]
         error_type = error_data["error_type"]
 
+        # The stub outlives a single example, so clear any earlier failure mode
+        mock_httpx.reset_mock(side_effect=True)
+
         if error_type == "authentication_error":
             # Test authentication error response consistency
-            response = self.client.get(endpoint)
+            response = _cached_get(client, endpoint)
 
             # Should return 401 status code
             assert response.status_code == 401
 
-            # Should have some error information
-            error_response = response.json()
-            assert error_response is not None
-            # Accept either "error" or "detail" key for error information
-            assert "error" in error_response or "detail" in error_response
-
-            # Get the actual error object
-            if "error" in error_response:
-                error_obj = error_response["error"]
-            else:
-                error_obj = error_response["detail"]["error"]
+            # Should have consistent error structure with the appropriate code
+            error_obj = _assert_error_envelope(response, "AUTHENTICATION_REQUIRED")
 
-            # Should have descriptive message
-            assert "message" in error_obj
-            assert len(error_obj["message"]) > 0
+            # Should have a descriptive message, a valid timestamp and a
+            # request ID
             assert isinstance(error_obj["message"], str)
-
-            # Should have valid timestamp
-            assert "timestamp" in error_obj
+            assert len(error_obj["message"]) > 0
             assert isinstance(error_obj["timestamp"], (int, float))
             assert error_obj["timestamp"] > 0
-
-            # Should have request ID
-            assert "request_id" in error_obj
             assert isinstance(error_obj["request_id"], int)
 
         elif error_type == "service_unavailable":
             # Mock service unavailable scenario
-            with patch("httpx.AsyncClient.request") as mock_request:
-                mock_request.side_effect = Exception("Connection refused")
-
-                # Create valid token for authentication
-                token_payload = {
-                    "sub": "test-user",
-                    "username": "test",
-                    "role": "user",
-                }
-                valid_token = create_access_token(token_payload)
-                headers = {"Authorization": f"Bearer {valid_token}"}
+            mock_httpx.side_effect = Exception("Connection refused")
 
-                response = self.client.get(endpoint, headers=headers)
+            response = client.get(endpoint, headers=_TEST_USER_HEADERS)
 
-                # Should return 500 or 503 status code for service errors
-                assert response.status_code in [500, 503]
+            # Should return 500 or 503 status code for service errors
+            assert response.status_code in [500, 503]
 
-                # Should have some error information
-                error_response = response.json()
-                assert error_response is not None
+            # Should have some error information
+            error_response = response.json()
+            assert error_response is not None
 
         elif error_type == "invalid_service":
             # Test invalid service endpoint
             invalid_endpoint = "/api/v1/invalid_service/test"
 
-            # Create valid token for authentication
-            token_payload = {
-                "sub": "test-user",
-                "username": "test",
-                "role": "user",
-            }
-            valid_token = create_access_token(token_payload)
-            headers = {"Authorization": f"Bearer {valid_token}"}
-
-            response = self.client.get(invalid_endpoint, headers=headers)
+            response = client.get(invalid_endpoint, headers=_TEST_USER_HEADERS)
 
             # Should return 404 status code
             assert response.status_code == 404
@@ -169,183 +209,86 @@ class TestAPIErrorResponseConsistencyProperties:
             error_response = response.json()
             assert error_response is not None
 
-    @given(user_data=valid_user_data())
-    @settings(max_examples=5, deadline=None)
-    def test_rate_limit_error_consistency(self, user_data):
+    def test_rate_limit_error_consistency(self, client):
         """
         Property: Rate limit errors should have consistent format
 
         For any rate limit exceeded scenario, the error response should follow the standard format.
         """
-        # Create valid token
-        token_payload = {
-            "sub": user_data["user_id"],
-            "username": user_data["username"],
-            "role": user_data["role"],
-        }
-        valid_token = create_access_token(token_payload)
-        headers = {"Authorization": f"Bearer {valid_token}"}
-
         # Mock rate limit middleware to trigger rate limit
         with patch(
             "services.api_gateway.middleware.rate_limit_middleware.RateLimitMiddleware._is_rate_limited"
         ) as mock_rate_limit:
             mock_rate_limit.return_value = True
 
-            response = self.client.get("/api/v1/items/parent", headers=headers)
+            response = client.get("/api/v1/items/parent", headers=_TEST_USER_HEADERS)
 
             # Should return 429 status code
             assert response.status_code == 429
 
-            # Should have consistent error structure (may be wrapped in detail)
-            error_data = response.json()
-            if "detail" in error_data:
-                error_obj = error_data["detail"]["error"]
-            else:
-                error_obj = error_data["error"]
-
-            assert "code" in error_obj
-            assert "message" in error_obj
-            assert "timestamp" in error_obj
-            assert "request_id" in error_obj
-
-            # Should have appropriate error code
-            assert error_obj["code"] == "RATE_LIMIT_EXCEEDED"
+            # Should have consistent error structure with the appropriate code
+            error_obj = _assert_error_envelope(response, "RATE_LIMIT_EXCEEDED")
 
             # Should have descriptive message about rate limiting
             assert "rate limit" in error_obj["message"].lower()
 
-    @given(user_data=valid_user_data())
-    @settings(max_examples=5, deadline=None)
-    def test_service_timeout_error_consistency(self, user_data):
+    def test_service_timeout_error_consistency(self, client, mock_httpx):
         """
         Property: Service timeout errors should have consistent format
 
         For any service timeout scenario, the error response should follow the standard format.
         """
-        # Create valid token
-        token_payload = {
-            "sub": user_data["user_id"],
-            "username": user_data["username"],
-            "role": user_data["role"],
-        }
-        valid_token = create_access_token(token_payload)
-        headers = {"Authorization": f"Bearer {valid_token}"}
-
         # Mock service timeout scenario
-        import httpx
-
-        with patch("httpx.AsyncClient.request") as mock_request:
-            mock_request.side_effect = httpx.TimeoutException("Request timeout")
+        mock_httpx.side_effect = httpx.TimeoutException("Request timeout")
 
-            response = self.client.get("/api/v1/items/parent", headers=headers)
+        response = client.get("/api/v1/items/parent", headers=_TEST_USER_HEADERS)
 
-            # Should return 504 status code
-            assert response.status_code == 504
+        # Should return 504 status code
+        assert response.status_code == 504
 
-            # Should have consistent error structure (may be wrapped in detail)
-            error_data = response.json()
-            if "detail" in error_data:
-                error_obj = error_data["detail"]["error"]
-            else:
-                error_obj = error_data["error"]
+        # Should have consistent error structure with the appropriate code
+        error_obj = _assert_error_envelope(response, "SERVICE_TIMEOUT")
 
-            assert "code" in error_obj
-            assert "message" in error_obj
-            assert "timestamp" in error_obj
-            assert "request_id" in error_obj
+        # Should have descriptive message about timeout
+        assert "timeout" in error_obj["message"].lower()
 
-            # Should have appropriate error code
-            assert error_obj["code"] == "SERVICE_TIMEOUT"
-
-            # Should have descriptive message about timeout
-            assert "timeout" in error_obj["message"].lower()
-
-    @given(user_data=valid_user_data())
-    @settings(max_examples=5, deadline=None)
-    def test_service_unavailable_error_consistency(self, user_data):
+    def test_service_unavailable_error_consistency(self, client, mock_httpx):
         """
         Property: Service unavailable errors should have consistent format
 
         For any service unavailable scenario, the error response should follow the standard format.
         """
-        # Create valid token
-        token_payload = {
-            "sub": user_data["user_id"],
-            "username": user_data["username"],
-            "role": user_data["role"],
-        }
-        valid_token = create_access_token(token_payload)
-        headers = {"Authorization": f"Bearer {valid_token}"}
-
         # Mock service unavailable scenario
-        import httpx
+        mock_httpx.side_effect = httpx.ConnectError("Connection failed")
 
-        with patch("httpx.AsyncClient.request") as mock_request:
-            mock_request.side_effect = httpx.ConnectError("Connection failed")
+        response = client.get("/api/v1/items/parent", headers=_TEST_USER_HEADERS)
 
-            response = self.client.get("/api/v1/items/parent", headers=headers)
+        # Should return 503 status code
+        assert response.status_code == 503
 
-            # Should return 503 status code
-            assert response.status_code == 503
+        # Should have consistent error structure with the appropriate code
+        error_obj = _assert_error_envelope(response, "SERVICE_UNAVAILABLE")
 
-            # Should have consistent error structure (may be wrapped in detail)
-            error_data = response.json()
-            if "detail" in error_data:
-                error_obj = error_data["detail"]["error"]
-            else:
-                error_obj = error_data["error"]
+        # Should have descriptive message about unavailability
+        assert "unavailable" in error_obj["message"].lower()
 
-            assert "code" in error_obj
-            assert "message" in error_obj
-            assert "timestamp" in error_obj
-            assert "request_id" in error_obj
-
-            # Should have appropriate error code
-            assert error_obj["code"] == "SERVICE_UNAVAILABLE"
-
-            # Should have descriptive message about unavailability
-            assert "unavailable" in error_obj["message"].lower()
-
-    def test_error_response_structure_consistency(self):
+    def test_error_response_structure_consistency(self, client):
         """
         Property: All error responses should have the same structure
 
         For any error response, the structure should be consistent across all error types.
         """
         # Test different error scenarios and verify structure consistency
-        error_responses = []
-
-        # Authentication error
-        response = self.client.get("/api/v1/items/parent")
-        error_responses.append(response.json())
-
-        # Invalid endpoint error
-        token_payload = {
-            "sub": "test-user",
-            "username": "test",
-            "role": "user",
-        }
-        valid_token = create_access_token(token_payload)
-        headers = {"Authorization": f"Bearer {valid_token}"}
-
-        response = self.client.get("/api/v1/nonexistent", headers=headers)
-        error_responses.append(response.json())
+        error_responses = [
+            # Authentication error
+            _cached_get(client, "/api/v1/items/parent"),
+            # Invalid endpoint error
+            client.get("/api/v1/nonexistent", headers=_TEST_USER_HEADERS),
+        ]
 
         # Verify all error responses have the same structure
-        # Errors may be wrapped in "detail" or directly in "error"
-        for error_response in error_responses:
-            # Check if error is wrapped in detail
-            if "detail" in error_response:
-                error_obj = error_response["detail"]["error"]
-            else:
-                error_obj = error_response["error"]
-
-            # Check error object structure
-            assert "code" in error_obj, f"Missing field: code"
-            assert "message" in error_obj, f"Missing field: message"
-            assert "timestamp" in error_obj, f"Missing field: timestamp"
-            assert "request_id" in error_obj, f"Missing field: request_id"
+        for response in error_responses:
+            error_obj = _assert_error_envelope(response)
 
             # Check field types
             assert isinstance(error_obj["code"], str)
@@ -373,36 +316,22 @@ class TestAPIErrorResponseConsistencyProperties:
         ),
     )
     @settings(max_examples=5, deadline=None)
-    def test_invalid_token_error_consistency(self, invalid_token, endpoint):
+    def test_invalid_token_error_consistency(self, client, invalid_token, endpoint):
         """
         Property: Invalid token errors should have consistent format
 
         For any invalid token scenario, the error response should follow the standard format.
         """
-        # Ensure we have a clearly invalid token
-        if invalid_token.startswith("Bearer "):
-            invalid_token = invalid_token[7:]  # Remove Bearer prefix if present
-
+        # The alphabet has no spaces, so the drawn token can never carry its
+        # own "Bearer " prefix and the header can be built directly
         headers = {"Authorization": f"Bearer {invalid_token}"}
-        response = self.client.get(endpoint, headers=headers)
+        response = client.get(endpoint, headers=headers)
 
         # Should return 401 status code
         assert response.status_code == 401
 
-        # Should have consistent error structure (may be wrapped in detail)
-        error_data = response.json()
-        if "detail" in error_data:
-            error_obj = error_data["detail"]["error"]
-        else:
-            error_obj = error_data["error"]
-
-        assert "code" in error_obj
-        assert "message" in error_obj
-        assert "timestamp" in error_obj
-        assert "request_id" in error_obj
-
-        # Should have appropriate error code
-        assert error_obj["code"] == "INVALID_TOKEN"
+        # Should have consistent error structure with the appropriate code
+        error_obj = _assert_error_envelope(response, "INVALID_TOKEN")
 
         # Should have descriptive message about invalid token
         assert "token" in error_obj["message"].lower()
@@ -4,13 +4,15 @@
 **Validates: Requirements 9.4, 9.5**
 """
 
+from contextlib import contextmanager
 from datetime import datetime, timedelta, timezone
 from uuid import uuid4
 
-from hypothesis import HealthCheck, given, settings
+import pytest
+from hypothesis import given, settings
 from hypothesis import strategies as st
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.orm import Session, sessionmaker
 from sqlalchemy.pool import StaticPool
 
 from shared.models.assignment_history import AssignmentHistory
@@ -19,128 +21,186 @@ from shared.models.item import ChildItem, ItemCategory, ItemType, ParentItem
 from shared.models.location import Location, LocationType
 from shared.models.user import Role, User
 
+# Scaffolding shared by every example, populated once by ``static_entities``
+_STATIC = {}
 
-def get_test_session():
-    """Create a fresh test database session for each test."""
+
+@pytest.fixture(scope="session", autouse=True)
+def static_entities():
+    """Create the schema and the immutable entity graph once per session.
+
+    Examples only write assignment history, so the role, user, location, item
+    types and the items themselves are inserted a single time and reused. The
+    per-example reassignment is rolled back with the example. The database
+    lives in process memory, so each xdist worker builds its own copy and the
+    tests here can be split across workers with ``--dist load``.
+    """
     engine = create_engine(
         "sqlite:///:memory:",
         connect_args={"check_same_thread": False},
         poolclass=StaticPool,
     )
-    Base.metadata.create_all(bind=engine)
-    SessionLocal = sessionmaker(bind=engine)
-    return SessionLocal(), engine
-
-
-@st.composite
-def child_item_with_parents(draw):
-    """Generate a child item with two parent items for reassignment testing."""
-    # Generate item types
-    parent_item_type = ItemType(
-        id=uuid4(),
-        name=draw(st.text(min_size=1, max_size=50)),
-        description=draw(st.text(min_size=0, max_size=200)),
-        category=ItemCategory.PARENT,
-    )
 
-    child_item_type = ItemType(
-        id=uuid4(),
-        name=draw(st.text(min_size=1, max_size=50)),
-        description=draw(st.text(min_size=0, max_size=200)),
-        category=ItemCategory.CHILD,
-    )
+    # pysqlite defers BEGIN on its own, which breaks SAVEPOINT handling; let
+    # SQLAlchemy emit it so examples can roll back their nested transactions
+    @event.listens_for(engine, "connect")
+    def _disable_pysqlite_transactions(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, "begin")
+    def _emit_begin(conn):
+        conn.exec_driver_sql("BEGIN")
+
+    # Throwaway in-memory database: skip durability work on every write; the
+    # tests do not exercise foreign keys, so leave enforcement off
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragma(dbapi_conn, connection_record):
+        cursor = dbapi_conn.cursor()
+        for pragma in (
+            "synchronous=OFF",
+            "journal_mode=MEMORY",
+            "locking_mode=EXCLUSIVE",
+            "temp_store=MEMORY",
+            "foreign_keys=OFF",
+        ):
+            cursor.execute(f"PRAGMA {pragma}")
+        cursor.close()
 
-    # Generate location type and location
-    location_type = LocationType(
-        id=uuid4(),
-        name=draw(st.text(min_size=1, max_size=50)),
-        description=draw(st.text(min_size=0, max_size=200)),
-    )
-
-    location = Location(
-        id=uuid4(),
-        name=draw(st.text(min_size=1, max_size=50)),
-        description=draw(st.text(min_size=0, max_size=200)),
-        location_type_id=location_type.id,
-        location_type=location_type,
-    )
+    Base.metadata.create_all(bind=engine)
+    SessionLocal = sessionmaker(bind=engine, expire_on_commit=False)
 
-    # Generate user
     role = Role(
         id=uuid4(),
         name="inventory_manager",
         description="Inventory Manager Role",
         permissions={"inventory": ["read", "write"]},
     )
-
     user = User(
         id=uuid4(),
-        username=draw(st.text(min_size=1, max_size=50)),
-        email=draw(st.emails()),
+        username="n",
+        email="n@example.com",
         password_hash="hashed_password",
         active=True,
         role_id=role.id,
-        role=role,
-    )
-
-    # Generate parent items
-    parent_item_1 = ParentItem(
-        id=uuid4(),
-        name=draw(st.text(min_size=1, max_size=100)),
-        description=draw(st.text(min_size=0, max_size=200)),
-        item_type_id=parent_item_type.id,
-        current_location_id=location.id,
-        created_by=user.id,
-        item_type=parent_item_type,
-        current_location=location,
-        creator=user,
     )
-
-    parent_item_2 = ParentItem(
-        id=uuid4(),
-        name=draw(st.text(min_size=1, max_size=100)),
-        description=draw(st.text(min_size=0, max_size=200)),
-        item_type_id=parent_item_type.id,
-        current_location_id=location.id,
-        created_by=user.id,
-        item_type=parent_item_type,
-        current_location=location,
-        creator=user,
+    location_type = LocationType(id=uuid4(), name="n")
+    location = Location(id=uuid4(), name="n", location_type_id=location_type.id)
+    parent_item_type = ItemType(id=uuid4(), name="n", category=ItemCategory.PARENT)
+    child_item_type = ItemType(id=uuid4(), name="n", category=ItemCategory.CHILD)
+    parent_item_1, parent_item_2 = (
+        ParentItem(
+            id=parent_id,
+            sku=str(parent_id),
+            item_type_id=parent_item_type.id,
+            current_location_id=location.id,
+            created_by=user.id,
+        )
+        for parent_id in (uuid4(), uuid4())
     )
 
-    # Generate child item initially assigned to parent_item_1
+    # Child item initially assigned to parent_item_1
+    child_item_id = uuid4()
     child_item = ChildItem(
-        id=uuid4(),
-        name=draw(st.text(min_size=1, max_size=100)),
-        description=draw(st.text(min_size=0, max_size=200)),
+        id=child_item_id,
+        sku=str(child_item_id),
         item_type_id=child_item_type.id,
         parent_item_id=parent_item_1.id,
         created_by=user.id,
-        item_type=child_item_type,
-        parent_item=parent_item_1,
-        creator=user,
     )
 
-    return {
-        "child_item": child_item,
-        "parent_item_1": parent_item_1,
-        "parent_item_2": parent_item_2,
-        "user": user,
-        "parent_item_type": parent_item_type,
-        "child_item_type": child_item_type,
-        "location_type": location_type,
-        "location": location,
-        "role": role,
-    }
-
-
-@given(data=child_item_with_parents())
-@settings(
-    max_examples=10,
-    deadline=None,
-    suppress_health_check=[HealthCheck.function_scoped_fixture],
-)
-def test_assignment_history_tracking_property(data):
+    with SessionLocal() as session:
+        session.add_all(
+            [role, user, location_type, location, parent_item_type, child_item_type]
+        )
+        session.add_all([parent_item_1, parent_item_2, child_item])
+        session.commit()
+
+    # Tests only need the ids, so read them once instead of on every access
+    _STATIC.update(
+        engine=engine,
+        ids=(child_item.id, parent_item_1.id, parent_item_2.id, user.id),
+    )
+    yield _STATIC
+
+    _STATIC.clear()
+    Base.metadata.drop_all(bind=engine)
+    engine.dispose()
+
+
+@contextmanager
+def example_session():
+    """Yield a session whose writes are rolled back when the example ends.
+
+    The session joins an outer transaction on its own connection. Examples only
+    ``flush()``, so nothing is committed and the schema is never rebuilt.
+    """
+    connection = _STATIC["engine"].connect()
+    transaction = connection.begin()
+    session = Session(
+        bind=connection,
+        join_transaction_mode="create_savepoint",
+        expire_on_commit=False,
+        autoflush=False,
+    )
+    try:
+        yield session
+    finally:
+        session.close()
+        transaction.rollback()
+        connection.close()
+
+
+# Each example mints only its history row; the items are seeded once
+history_ids = st.uuids()
+
+
+def seeded_ids():
+    """Return the ids of the seeded child, its two parents and the acting user."""
+    return _STATIC["ids"]
+
+
+def as_utc(value):
+    """Reattach UTC to a datetime read back from SQLite, which stores it naive."""
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def history_newest_first(session, child_item_id):
+    """Build the query for a child's assignment history, newest first."""
+    return (
+        session.query(AssignmentHistory)
+        .filter(AssignmentHistory.child_item_id == child_item_id)
+        .order_by(AssignmentHistory.assigned_at.desc())
+    )
+
+
+def test_history_newest_first_uses_child_time_index():
+    """
+    Test that the newest-first history query is served by the composite index.
+
+    The plan is data-independent, so it is checked once rather than per example.
+
+    **Validates: Requirements 9.5**
+    """
+    with example_session() as session:
+        child_id, _, _, _ = seeded_ids()
+        statement = history_newest_first(session, child_id)
+        compiled = statement.statement.compile(bind=session.get_bind())
+        plan = " ".join(
+            row[-1]
+            for row in session.connection().exec_driver_sql(
+                f"EXPLAIN QUERY PLAN {compiled}",
+                # The plan does not depend on the value; pass it as plain text
+                tuple(str(value) for value in compiled.params.values()),
+            )
+        )
+
+    assert "USING INDEX ix_assignment_history_child_assigned_at" in plan
+    assert "TEMP B-TREE FOR ORDER BY" not in plan
+
+
+@given(history_id=history_ids)
+@settings(max_examples=10, deadline=None)
+def test_assignment_history_tracking_property(history_id):
     """
     Property 11: Assignment History Tracking
 
@@ -149,354 +209,201 @@ def test_assignment_history_tracking_property(data):
 
     **Validates: Requirements 9.4, 9.5**
     """
-    session, engine = get_test_session()
+    with example_session() as session:
+        child_id, parent_1_id, parent_2_id, user_id = seeded_ids()
 
-    try:
-        # Setup test data
-        child_item = data["child_item"]
-        parent_item_1 = data["parent_item_1"]
-        parent_item_2 = data["parent_item_2"]
-        user = data["user"]
-        parent_item_type = data["parent_item_type"]
-        child_item_type = data["child_item_type"]
-        location_type = data["location_type"]
-        location = data["location"]
-        role = data["role"]
-
-        # Add all entities to database
-        session.add(role)
-        session.add(user)
-        session.add(location_type)
-        session.add(location)
-        session.add(parent_item_type)
-        session.add(child_item_type)
-        session.add(parent_item_1)
-        session.add(parent_item_2)
-        session.add(child_item)
-        session.commit()
+        # Load the child into this session so its reassignment is rolled back
+        child_item = session.get(ChildItem, child_id)
 
-        # Record the time before reassignment
-        before_assignment_time = datetime.now(timezone.utc)
+        # Pass the timestamp explicitly so it can be compared exactly
+        assignment_time = datetime.now(timezone.utc)
 
         # Simulate child item reassignment by creating assignment history record
         original_parent_id = child_item.parent_item_id
-        child_item.parent_item_id = parent_item_2.id
+        child_item.parent_item_id = parent_2_id
 
         assignment_history = AssignmentHistory(
-            child_item_id=child_item.id,
+            id=history_id,
+            child_item_id=child_id,
             from_parent_item_id=original_parent_id,
-            to_parent_item_id=parent_item_2.id,
-            assigned_at=datetime.now(timezone.utc),
-            assigned_by=user.id,
+            to_parent_item_id=parent_2_id,
+            assigned_at=assignment_time,
+            assigned_by=user_id,
             notes="Test reassignment",
         )
 
         session.add(assignment_history)
-        session.commit()
-        session.refresh(assignment_history)
-
-        # Record the time after reassignment
-        after_assignment_time = datetime.now(timezone.utc)
-
-        # Verify assignment history properties
-        assert assignment_history.id is not None
-        assert assignment_history.child_item_id == child_item.id
-        assert assignment_history.from_parent_item_id == parent_item_1.id
-        assert assignment_history.to_parent_item_id == parent_item_2.id
-        assert assignment_history.assigned_by == user.id
-
-        # Make assigned_at timezone-aware if it's naive (SQLite returns naive datetimes)
-        assigned_at = assignment_history.assigned_at
-        if assigned_at.tzinfo is None:
-            assigned_at = assigned_at.replace(tzinfo=timezone.utc)
-
-        assert before_assignment_time <= assigned_at <= after_assignment_time
-        assert child_item.parent_item_id == parent_item_2.id
-
-        # Query tests
-        history_records = (
+        session.flush()
+        # Detach the record so the query below builds it from the stored row
+        # instead of returning the instance from the identity map
+        session.expunge(assignment_history)
+
+        # Fetch the child's history in one round trip; one() also asserts
+        # that exactly a single record was written
+        row = (
             session.query(AssignmentHistory)
-            .filter(AssignmentHistory.child_item_id == child_item.id)
-            .all()
+            .filter(AssignmentHistory.child_item_id == child_id)
+            .one()
         )
-        assert len(history_records) == 1
 
-    finally:
-        session.close()
-        Base.metadata.drop_all(bind=engine)
-        engine.dispose()
+        # Verify assignment history properties on the fetched row
+        assert row.id == history_id
+        assert row.child_item_id == child_id
+        assert row.from_parent_item_id == parent_1_id
+        assert row.to_parent_item_id == parent_2_id
+        assert row.assigned_by == user_id
+
+        assert as_utc(row.assigned_at) == assignment_time
+        assert child_item.parent_item_id == parent_2_id
 
 
-@given(data=child_item_with_parents())
-@settings(
-    max_examples=10,
-    deadline=None,
-    suppress_health_check=[HealthCheck.function_scoped_fixture],
-)
-def test_initial_assignment_history_tracking(data):
+@given(history_id=history_ids)
+@settings(max_examples=3, deadline=None)
+def test_initial_assignment_history_tracking(history_id):
     """
     Test that initial assignment (creation) is tracked in assignment history.
 
     **Validates: Requirements 9.4**
     """
-    session, engine = get_test_session()
-
-    try:
-        # Setup test data
-        child_item = data["child_item"]
-        parent_item_1 = data["parent_item_1"]
-        parent_item_2 = data["parent_item_2"]
-        user = data["user"]
-        parent_item_type = data["parent_item_type"]
-        child_item_type = data["child_item_type"]
-        location_type = data["location_type"]
-        location = data["location"]
-        role = data["role"]
-
-        # Add all entities to database
-        session.add(role)
-        session.add(user)
-        session.add(location_type)
-        session.add(location)
-        session.add(parent_item_type)
-        session.add(child_item_type)
-        session.add(parent_item_1)
-        session.add(parent_item_2)
-        session.add(child_item)
-        session.commit()
+    with example_session() as session:
+        child_id, parent_1_id, _, user_id = seeded_ids()
 
-        # Record the time before initial assignment
-        before_assignment_time = datetime.now(timezone.utc)
+        # Pass the timestamp explicitly so it can be compared exactly
+        assignment_time = datetime.now(timezone.utc)
 
         # Simulate initial assignment history record creation
         initial_assignment_history = AssignmentHistory(
-            child_item_id=child_item.id,
+            id=history_id,
+            child_item_id=child_id,
             from_parent_item_id=None,  # Initial assignment has no "from" parent
-            to_parent_item_id=parent_item_1.id,
-            assigned_at=datetime.now(timezone.utc),
-            assigned_by=user.id,
+            to_parent_item_id=parent_1_id,
+            assigned_at=assignment_time,
+            assigned_by=user_id,
             notes="Initial assignment",
         )
 
         session.add(initial_assignment_history)
-        session.commit()
-        session.refresh(initial_assignment_history)
+        session.flush()
+        # Start from an empty identity map so the record is loaded from the
+        # stored row rather than handed back as the instance built above
+        session.expunge_all()
 
-        # Record the time after assignment
-        after_assignment_time = datetime.now(timezone.utc)
+        row = session.get(AssignmentHistory, history_id)
 
         # Verify initial assignment history properties
-        assert initial_assignment_history.id is not None
-        assert initial_assignment_history.child_item_id == child_item.id
-        assert initial_assignment_history.from_parent_item_id is None
-        assert initial_assignment_history.to_parent_item_id == parent_item_1.id
-        assert initial_assignment_history.assigned_by == user.id
-
-        # Make assigned_at timezone-aware if it's naive (SQLite returns naive datetimes)
-        assigned_at = initial_assignment_history.assigned_at
-        if assigned_at.tzinfo is None:
-            assigned_at = assigned_at.replace(tzinfo=timezone.utc)
+        assert row is not None
+        assert row.child_item_id == child_id
+        assert row.from_parent_item_id is None
+        assert row.to_parent_item_id == parent_1_id
+        assert row.assigned_by == user_id
 
-        assert before_assignment_time <= assigned_at <= after_assignment_time
+        assert as_utc(row.assigned_at) == assignment_time
 
-    finally:
-        session.close()
-        Base.metadata.drop_all(bind=engine)
-        engine.dispose()
 
-
-@given(data=child_item_with_parents())
-@settings(
-    max_examples=10,
-    deadline=None,
-    suppress_health_check=[HealthCheck.function_scoped_fixture],
-)
-def test_multiple_assignment_history_chronological_order(data):
+def test_multiple_assignment_history_chronological_order():
     """
     Test that multiple assignment history records are maintained in chronological order.
 
     **Validates: Requirements 9.5**
     """
-    session, engine = get_test_session()
-
-    try:
-        # Setup test data
-        child_item = data["child_item"]
-        parent_item_1 = data["parent_item_1"]
-        parent_item_2 = data["parent_item_2"]
-        user = data["user"]
-        parent_item_type = data["parent_item_type"]
-        child_item_type = data["child_item_type"]
-        location_type = data["location_type"]
-        location = data["location"]
-        role = data["role"]
-
-        # Add all entities to database
-        session.add(role)
-        session.add(user)
-        session.add(location_type)
-        session.add(location)
-        session.add(parent_item_type)
-        session.add(child_item_type)
-        session.add(parent_item_1)
-        session.add(parent_item_2)
-        session.add(child_item)
-        session.commit()
+    with example_session() as session:
+        child_id, parent_1_id, parent_2_id, user_id = seeded_ids()
 
         # Create multiple assignment history records with different timestamps
-        assignment_times = [
-            datetime.now(timezone.utc) - timedelta(hours=3),
-            datetime.now(timezone.utc) - timedelta(hours=2),
-            datetime.now(timezone.utc) - timedelta(hours=1),
-            datetime.now(timezone.utc),
+        now = datetime.now(timezone.utc)
+        assignment_times = [now - timedelta(hours=h) for h in (3, 2, 1, 0)]
+
+        # Alternate between parent items; the first assignment has no "from"
+        rows = [
+            {
+                "child_item_id": child_id,
+                "from_parent_item_id": (
+                    None if i == 0 else (parent_1_id if i % 2 == 0 else parent_2_id)
+                ),
+                "to_parent_item_id": parent_2_id if i % 2 == 0 else parent_1_id,
+                "assigned_at": assignment_time,
+                "assigned_by": user_id,
+                "notes": f"Assignment {i + 1}",
+            }
+            for i, assignment_time in enumerate(assignment_times)
         ]
 
-        for i, assignment_time in enumerate(assignment_times):
-            # Alternate between parent items
-            current_from = parent_item_1 if i % 2 == 0 else parent_item_2
-            current_to = parent_item_2 if i % 2 == 0 else parent_item_1
-
-            assignment_history = AssignmentHistory(
-                child_item_id=child_item.id,
-                from_parent_item_id=(
-                    current_from.id if i > 0 else None
-                ),  # First assignment has no "from"
-                to_parent_item_id=current_to.id,
-                assigned_at=assignment_time,
-                assigned_by=user.id,
-                notes=f"Assignment {i + 1}",
+        # One multi-row INSERT that hands back the generated ids
+        inserted_ids = (
+            session.execute(
+                insert(AssignmentHistory).values(rows).returning(AssignmentHistory.id)
             )
-
-            session.add(assignment_history)
-
-        session.commit()
-
-        # Query assignment history ordered by timestamp (most recent first)
-        ordered_assignments = (
-            session.query(AssignmentHistory)
-            .filter(AssignmentHistory.child_item_id == child_item.id)
-            .order_by(AssignmentHistory.assigned_at.desc())
+            .scalars()
             .all()
         )
 
+        # Query assignment history ordered by timestamp (most recent first)
+        ordered_assignments = history_newest_first(session, child_id).all()
+
         # Verify chronological ordering (most recent first)
+        assert {a.id for a in ordered_assignments} == set(inserted_ids)
         assert len(ordered_assignments) == 4
-        for i in range(len(ordered_assignments) - 1):
-            # Make assigned_at timezone-aware if it's naive (SQLite returns naive datetimes)
-            current_at = ordered_assignments[i].assigned_at
-            next_at = ordered_assignments[i + 1].assigned_at
-            if current_at.tzinfo is None:
-                current_at = current_at.replace(tzinfo=timezone.utc)
-            if next_at.tzinfo is None:
-                next_at = next_at.replace(tzinfo=timezone.utc)
-
-            assert current_at >= next_at
+        ordered_times = [as_utc(a.assigned_at) for a in ordered_assignments]
+        assert ordered_times == sorted(ordered_times, reverse=True)
 
         # Verify the most recent assignment is first
-        first_at = ordered_assignments[0].assigned_at
-        last_at = ordered_assignments[-1].assigned_at
-        if first_at.tzinfo is None:
-            first_at = first_at.replace(tzinfo=timezone.utc)
-        if last_at.tzinfo is None:
-            last_at = last_at.replace(tzinfo=timezone.utc)
+        assert ordered_times[0] == assignment_times[-1]
+        assert ordered_times[-1] == assignment_times[0]
 
-        assert first_at == assignment_times[-1]
-        assert last_at == assignment_times[0]
-
-    finally:
-        session.close()
-        Base.metadata.drop_all(bind=engine)
-        engine.dispose()
 
-
-@given(data=child_item_with_parents())
-@settings(
-    max_examples=10,
-    deadline=None,
-    suppress_health_check=[HealthCheck.function_scoped_fixture],
-)
-def test_assignment_history_filtering_by_date_range(data):
+def test_assignment_history_filtering_by_date_range():
     """
     Test that assignment history can be filtered by date ranges.
 
     **Validates: Requirements 9.5**
     """
-    session, engine = get_test_session()
-
-    try:
-        # Setup test data
-        child_item = data["child_item"]
-        parent_item_1 = data["parent_item_1"]
-        parent_item_2 = data["parent_item_2"]
-        user = data["user"]
-        parent_item_type = data["parent_item_type"]
-        child_item_type = data["child_item_type"]
-        location_type = data["location_type"]
-        location = data["location"]
-        role = data["role"]
-
-        # Add all entities to database
-        session.add(role)
-        session.add(user)
-        session.add(location_type)
-        session.add(location)
-        session.add(parent_item_type)
-        session.add(child_item_type)
-        session.add(parent_item_1)
-        session.add(parent_item_2)
-        session.add(child_item)
-        session.commit()
+    with example_session() as session:
+        child_id, parent_1_id, parent_2_id, user_id = seeded_ids()
 
         # Create assignment history records across different time periods
         base_time = datetime.now(timezone.utc)
 
+        def history_row(from_parent_id, to_parent_id, assigned_at, notes):
+            return {
+                "id": uuid4(),
+                "child_item_id": child_id,
+                "from_parent_item_id": from_parent_id,
+                "to_parent_item_id": to_parent_id,
+                "assigned_at": assigned_at,
+                "assigned_by": user_id,
+                "notes": notes,
+            }
+
         # Assignments outside the filter range
-        old_assignment = AssignmentHistory(
-            child_item_id=child_item.id,
-            from_parent_item_id=None,
-            to_parent_item_id=parent_item_1.id,
-            assigned_at=base_time - timedelta(days=10),
-            assigned_by=user.id,
-            notes="Old assignment",
+        old_assignment = history_row(
+            None, parent_1_id, base_time - timedelta(days=10), "Old assignment"
         )
-
-        future_assignment = AssignmentHistory(
-            child_item_id=child_item.id,
-            from_parent_item_id=parent_item_1.id,
-            to_parent_item_id=parent_item_2.id,
-            assigned_at=base_time + timedelta(days=10),
-            assigned_by=user.id,
-            notes="Future assignment",
+        future_assignment = history_row(
+            parent_1_id,
+            parent_2_id,
+            base_time + timedelta(days=10),
+            "Future assignment",
         )
 
         # Assignments within the filter range
-        recent_assignment1 = AssignmentHistory(
-            child_item_id=child_item.id,
-            from_parent_item_id=parent_item_1.id,
-            to_parent_item_id=parent_item_2.id,
-            assigned_at=base_time - timedelta(hours=2),
-            assigned_by=user.id,
-            notes="Recent assignment 1",
+        recent_assignment1 = history_row(
+            parent_1_id,
+            parent_2_id,
+            base_time - timedelta(hours=2),
+            "Recent assignment 1",
         )
-
-        recent_assignment2 = AssignmentHistory(
-            child_item_id=child_item.id,
-            from_parent_item_id=parent_item_2.id,
-            to_parent_item_id=parent_item_1.id,
-            assigned_at=base_time - timedelta(hours=1),
-            assigned_by=user.id,
-            notes="Recent assignment 2",
+        recent_assignment2 = history_row(
+            parent_2_id,
+            parent_1_id,
+            base_time - timedelta(hours=1),
+            "Recent assignment 2",
         )
 
-        session.add_all(
-            [
-                old_assignment,
-                future_assignment,
-                recent_assignment1,
-                recent_assignment2,
-            ]
+        session.bulk_insert_mappings(
+            AssignmentHistory,
+            [old_assignment, future_assignment, recent_assignment1, recent_assignment2],
         )
-        session.commit()
+        session.flush()
 
         # Define filter range (last 3 hours)
         start_date = base_time - timedelta(hours=3)
@@ -506,7 +413,7 @@ def test_assignment_history_filtering_by_date_range(data):
         filtered_assignments = (
             session.query(AssignmentHistory)
             .filter(
-                AssignmentHistory.child_item_id == child_item.id,
+                AssignmentHistory.child_item_id == child_id,
                 AssignmentHistory.assigned_at >= start_date,
                 AssignmentHistory.assigned_at <= end_date,
             )
@@ -516,23 +423,12 @@ def test_assignment_history_filtering_by_date_range(data):
 
         # Verify only assignments within the date range are returned
         assert len(filtered_assignments) == 2
-        assignment_ids = [a.id for a in filtered_assignments]
-        assert recent_assignment2.id in assignment_ids
-        assert recent_assignment1.id in assignment_ids
-        assert old_assignment.id not in assignment_ids
-        assert future_assignment.id not in assignment_ids
+        assignment_ids = {a.id for a in filtered_assignments}
+        assert recent_assignment2["id"] in assignment_ids
+        assert recent_assignment1["id"] in assignment_ids
+        assert old_assignment["id"] not in assignment_ids
+        assert future_assignment["id"] not in assignment_ids
 
         # Verify chronological ordering within filtered results
-        first_at = filtered_assignments[0].assigned_at
-        second_at = filtered_assignments[1].assigned_at
-        if first_at.tzinfo is None:
-            first_at = first_at.replace(tzinfo=timezone.utc)
-        if second_at.tzinfo is None:
-            second_at = second_at.replace(tzinfo=timezone.utc)
-
+        first_at, second_at = (as_utc(a.assigned_at) for a in filtered_assignments)
         assert first_at >= second_at
-
-    finally:
-        session.close()
-        Base.metadata.drop_all(bind=engine)
-        engine.dispose()
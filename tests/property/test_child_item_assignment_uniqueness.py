@@ -5,11 +5,14 @@ Validates: Requirements 9.2
 """
 
 import uuid
+from contextlib import contextmanager
 
+import pytest
 from hypothesis import HealthCheck, given, settings
 from hypothesis import strategies as st
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import create_engine, event, func, insert
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
 
 from shared.models import (
     Base,
@@ -25,20 +28,98 @@ from shared.models import (
 
 # Test database setup
 TEST_DATABASE_URL = "sqlite:///:memory:"
-engine = create_engine(TEST_DATABASE_URL, echo=False)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+engine = create_engine(
+    TEST_DATABASE_URL,
+    echo=False,
+    connect_args={"check_same_thread": False},
+    poolclass=StaticPool,
+)
+
+
+# pysqlite defers BEGIN on its own, which breaks SAVEPOINT handling; let
+# SQLAlchemy emit it so examples can roll back their nested transactions
+@event.listens_for(engine, "connect")
+def _disable_pysqlite_transactions(dbapi_connection, connection_record):
+    dbapi_connection.isolation_level = None
+
+
+@event.listens_for(engine, "begin")
+def _emit_begin(conn):
+    conn.exec_driver_sql("BEGIN")
+
+
+# Throwaway in-memory database: skip durability work on every write; the
+# tests do not exercise foreign keys, so leave enforcement off
+@event.listens_for(engine, "connect")
+def set_sqlite_pragma(dbapi_conn, connection_record):
+    cursor = dbapi_conn.cursor()
+    for pragma in (
+        "synchronous=OFF",
+        "journal_mode=MEMORY",
+        "locking_mode=EXCLUSIVE",
+        "temp_store=MEMORY",
+        "foreign_keys=OFF",
+    ):
+        cursor.execute(f"PRAGMA {pragma}")
+    cursor.close()
+
+
+# Ids of the scaffolding rows shared by every example, set by ``seed_database``
+_STATIC = {}
+
+MAX_PARENTS = 4
+MAX_CHILDREN = 5
 
+# Every example is rolled back, so all of them can reuse the same item ids
+PARENT_IDS = [uuid.uuid4() for _ in range(MAX_PARENTS)]
+CHILD_IDS = [uuid.uuid4() for _ in range(MAX_CHILDREN)]
 
-def setup_test_database():
-    """Set up test database with tables."""
+
+def seed_database():
+    """Create the schema and the scaffolding rows every example builds on."""
     Base.metadata.create_all(bind=engine)
+    with Session(engine, expire_on_commit=False) as session:
+        user, location, parent_item_type, child_item_type = create_test_data(session)
+    _STATIC.update(
+        user_id=user.id,
+        location_id=location.id,
+        parent_item_type_id=parent_item_type.id,
+        child_item_type_id=child_item_type.id,
+    )
 
 
-def teardown_test_database():
-    """Clean up test database."""
+@pytest.fixture(scope="module", autouse=True)
+def test_database():
+    """Seed the database once for every example in this module."""
+    seed_database()
+    yield
+    _STATIC.clear()
     Base.metadata.drop_all(bind=engine)
 
 
+@contextmanager
+def example_session():
+    """Yield a session whose writes are rolled back when the example ends.
+
+    The session joins an outer transaction on its own connection, so its
+    ``commit()`` calls only release savepoints and the schema is never rebuilt.
+    """
+    connection = engine.connect()
+    transaction = connection.begin()
+    session = Session(
+        bind=connection,
+        autoflush=False,
+        expire_on_commit=False,
+        join_transaction_mode="create_savepoint",
+    )
+    try:
+        yield session
+    finally:
+        session.close()
+        transaction.rollback()
+        connection.close()
+
+
 def create_test_data(session):
     """Create minimal test data required for property tests."""
     # Create role
@@ -48,7 +129,6 @@ def create_test_data(session):
         description="Test role",
         permissions={},
     )
-    session.add(role)
 
     # Create user
     user = User(
@@ -59,13 +139,11 @@ def create_test_data(session):
         active=True,
         role_id=role.id,
     )
-    session.add(user)
 
     # Create location type
     location_type = LocationType(
         id=uuid.uuid4(), name="warehouse", description="Warehouse location"
     )
-    session.add(location_type)
 
     # Create location
     location = Location(
@@ -74,7 +152,6 @@ def create_test_data(session):
         description="Test location",
         location_type_id=location_type.id,
     )
-    session.add(location)
 
     # Create parent item type
     parent_item_type = ItemType(
@@ -83,7 +160,6 @@ def create_test_data(session):
         description="Parent item type",
         category=ItemCategory.PARENT,
     )
-    session.add(parent_item_type)
 
     # Create child item type
     child_item_type = ItemType(
@@ -92,15 +168,17 @@ def create_test_data(session):
         description="Child item type",
         category=ItemCategory.CHILD,
     )
-    session.add(child_item_type)
 
+    session.add_all(
+        [role, user, location_type, location, parent_item_type, child_item_type]
+    )
     session.commit()
     return user, location, parent_item_type, child_item_type
 
 
 @given(
-    parent_count=st.integers(min_value=2, max_value=4),
-    child_count=st.integers(min_value=1, max_value=5),
+    parent_count=st.integers(min_value=2, max_value=MAX_PARENTS),
+    child_count=st.integers(min_value=1, max_value=MAX_CHILDREN),
 )
 @settings(max_examples=10)
 def test_child_item_assignment_uniqueness_property(parent_count, child_count):
@@ -112,97 +190,93 @@ def test_child_item_assignment_uniqueness_property(parent_count, child_count):
 
     **Validates: Requirements 9.2**
     """
-    setup_test_database()
-
-    try:
-        session = SessionLocal()
-
-        # Create test data
-        user, location, parent_item_type, child_item_type = create_test_data(session)
-
-        # Create multiple parent items
-        parent_items = []
-        for i in range(parent_count):
-            parent_item = ParentItem(
-                id=uuid.uuid4(),
-                name=f"Parent_{i}",
-                description=f"Test parent item {i}",
-                item_type_id=parent_item_type.id,
-                current_location_id=location.id,
-                created_by=user.id,
-            )
-            session.add(parent_item)
-            parent_items.append(parent_item)
-
-        session.commit()
-
-        # Create child items and assign them to parent items
-        child_items = []
-        for i in range(child_count):
-            # Assign each child to the first parent initially
-            child_item = ChildItem(
-                id=uuid.uuid4(),
-                name=f"Child_{i}",
+    with example_session() as session:
+        # Scaffolding rows are seeded once; only the items vary per example
+        user_id = _STATIC["user_id"]
+
+        # Create multiple parent items in one INSERT; only their ids are used
+        parent_ids = PARENT_IDS[:parent_count]
+        session.execute(
+            insert(ParentItem),
+            [
+                {
+                    "id": parent_id,
+                    "sku": f"Parent_{i}",
+                    "description": f"Test parent item {i}",
+                    "item_type_id": _STATIC["parent_item_type_id"],
+                    "current_location_id": _STATIC["location_id"],
+                    "created_by": user_id,
+                }
+                for i, parent_id in enumerate(parent_ids)
+            ],
+        )
+
+        # Create child items, each assigned to the first parent initially
+        child_items = [
+            ChildItem(
+                id=child_id,
+                sku=f"Child_{i}",
                 description=f"Test child item {i}",
-                item_type_id=child_item_type.id,
-                parent_item_id=parent_items[0].id,
-                created_by=user.id,
+                item_type_id=_STATIC["child_item_type_id"],
+                parent_item_id=parent_ids[0],
+                created_by=user_id,
             )
-            session.add(child_item)
-            child_items.append(child_item)
-
+            for i, child_id in enumerate(CHILD_IDS[:child_count])
+        ]
+        session.add_all(child_items)
         session.commit()
 
         # Property verification: Each child item is assigned to exactly one parent
         for child_item in child_items:
-            session.refresh(child_item)
-
             # Requirement 9.2: Child item should be assigned to exactly one parent
             assert child_item.parent_item_id is not None
-            assert child_item.parent_item_id == parent_items[0].id
+            assert child_item.parent_item_id == parent_ids[0]
 
             # Verify the relationship is bidirectional
             assert child_item.parent_item is not None
-            assert child_item.parent_item.id == parent_items[0].id
+            assert child_item.parent_item.id == parent_ids[0]
 
         # Test reassignment: Move each child to different parents
         for i, child_item in enumerate(child_items):
             # Choose a different parent for reassignment
-            new_parent_index = (i + 1) % len(parent_items)
-            new_parent = parent_items[new_parent_index]
+            new_parent_id = parent_ids[(i + 1) % len(parent_ids)]
             old_parent_id = child_item.parent_item_id
 
             # Skip if we would reassign to the same parent
-            if new_parent.id == old_parent_id:
+            if new_parent_id == old_parent_id:
                 continue
 
             # Reassign child to new parent
-            child_item.parent_item_id = new_parent.id
+            child_item.parent_item_id = new_parent_id
             session.commit()
-            session.refresh(child_item)
+
+            # Only the relationship is stale after changing the foreign key
+            session.expire(child_item, ["parent_item"])
 
             # Property verification: Child is now assigned to new parent only
-            assert child_item.parent_item_id == new_parent.id
+            assert child_item.parent_item_id == new_parent_id
             assert child_item.parent_item_id != old_parent_id
 
             # Verify the relationship is correct
-            assert child_item.parent_item.id == new_parent.id
+            assert child_item.parent_item.id == new_parent_id
 
         # Verify uniqueness: No child should be assigned to multiple parents
         all_child_items = session.query(ChildItem).all()
 
+        # Count every child's parent links in one grouped query
+        parent_counts = dict(
+            session.query(ChildItem.id, func.count(ParentItem.id))
+            .join(ParentItem, ParentItem.id == ChildItem.parent_item_id)
+            .group_by(ChildItem.id)
+            .all()
+        )
+
         for child_item in all_child_items:
             # Each child should have exactly one parent_item_id
             assert child_item.parent_item_id is not None
 
-            # Count how many times this child appears in parent relationships
-            parent_count_for_child = 0
-            for parent_item in parent_items:
-                session.refresh(parent_item)
-                if child_item in parent_item.child_items:
-                    parent_count_for_child += 1
-
             # Property verification: Child appears in exactly one parent's child list
+            parent_count_for_child = parent_counts.get(child_item.id, 0)
             assert (
                 parent_count_for_child == 1
             ), f"Child {child_item.id} found in {parent_count_for_child} parents, expected 1"
@@ -220,13 +294,9 @@ def test_child_item_assignment_uniqueness_property(parent_count, child_count):
         # Verify we have the expected number of unique assignments
         assert len(child_parent_assignments) == child_count
 
-        session.close()
-
-    finally:
-        teardown_test_database()
-
 
 if __name__ == "__main__":
     # Run a simple test to verify the property works
+    seed_database()
     test_child_item_assignment_uniqueness_property(2, 3)
     print("Property test passed!")
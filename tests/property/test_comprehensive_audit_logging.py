@@ -4,87 +4,168 @@ Feature: inventory-management, Property 16: Comprehensive Audit Logging
 Validates: Requirements 7.5, 5.3
 """
 
+import asyncio
+import functools
+from types import SimpleNamespace
 from unittest.mock import MagicMock, patch
 
 import pytest
+from fastapi import Request, Response
 from fastapi.testclient import TestClient
-from hypothesis import given, settings
+from hypothesis import HealthCheck, Phase, given, settings
 from hypothesis import strategies as st
 
 from services.api_gateway.main import app
+from services.api_gateway.middleware.auth_middleware import AuthMiddleware
 from shared.auth.utils import create_access_token
 
 
-# Generators for test data
-@st.composite
-def api_request_data(draw):
-    """Generate API request data for logging tests."""
-    user_id = draw(st.uuids())
-    username = draw(
-        st.text(
-            min_size=3,
-            max_size=50,
-            alphabet=st.characters(whitelist_categories=("Lu", "Ll", "Nd")),
-        )
-    )
-    role = draw(st.sampled_from(["admin", "manager", "user"]))
-    method = draw(st.sampled_from(["GET", "POST", "PUT", "DELETE"]))
-    endpoint = draw(
-        st.sampled_from(
-            [
-                "/api/v1/items/parent",
-                "/api/v1/items/child",
-                "/api/v1/locations",
-                "/api/v1/users",
-                "/api/v1/reports",
-            ]
-        )
+# The logger and outbound calls are mocked, so failures are cheap to read
+# unshrunk; run only explicit and generated examples and skip the reuse,
+# shrink and explain phases. With no reuse phase the example database would
+# only ever be written, so it is turned off outright. Seeding is left to the
+# loaded profile: HYPOTHESIS_FAST replays fixed examples locally, while CI's
+# "fast" profile keeps drawing fresh ones.
+audit_settings = settings(
+    max_examples=5,
+    deadline=None,
+    database=None,
+    phases=[Phase.explicit, Phase.generate],
+    suppress_health_check=[HealthCheck.function_scoped_fixture],
+)
+
+
+# The fixed test user's payload never changes, so sign its token only once
+_TEST_USER_TOKEN = create_access_token(
+    {"sub": "test-user", "username": "test", "role": "user"}
+)
+
+
+# Successful microservice response; no test mutates it, so every example
+# shares it. The gateway only reads these four attributes, so a plain
+# namespace stands in for ``httpx.Response`` without MagicMock's overhead.
+_SUCCESS_RESPONSE = SimpleNamespace(
+    status_code=200,
+    content=b'{"status": "success"}',
+    headers={"content-type": "application/json"},
+    json=lambda: {"status": "success"},
+)
+
+
+@functools.lru_cache(maxsize=128)
+def _cached_token(sub, username, role):
+    """Sign a token for tests that compare its claims, once per payload."""
+    return create_access_token({"sub": sub, "username": username, "role": role})
+
+
+def _logged_messages(calls, needles):
+    """Return which ``needles`` occur in the logged messages of ``calls``.
+
+    Scans the calls once and stops as soon as every needle has been seen.
+    """
+    seen = set()
+    for call in calls:
+        message = call[0][0].lower()
+        seen.update(needle for needle in needles - seen if needle in message)
+        if seen == needles:
+            break
+    return seen
+
+
+async def _ok(request):
+    """Stand-in for the downstream app: answer every request with 200."""
+    return Response(status_code=200)
+
+
+def _run_middleware(method, path, headers=None):
+    """Pass one request through ``AuthMiddleware.dispatch`` and return the response.
+
+    Tests that only check what the middleware logs skip the ASGI stack,
+    routing and exception handlers of a ``TestClient`` round trip.
+    """
+    request = Request(
+        {
+            "type": "http",
+            "method": method,
+            "scheme": "http",
+            "server": ("testserver", 80),
+            "client": ("testclient", 50000),
+            "path": path,
+            "root_path": "",
+            "query_string": b"",
+            "headers": [
+                (name.lower().encode(), value.encode())
+                for name, value in (headers or {}).items()
+            ],
+        }
     )
+    return asyncio.run(AuthMiddleware(app=None).dispatch(request, _ok))
 
-    return {
-        "user_id": str(user_id),
-        "username": username,
-        "role": role,
-        "method": method,
-        "endpoint": endpoint,
-    }
-
-
-@st.composite
-def audit_scenario_data(draw):
-    """Generate audit scenario data."""
-    scenario_type = draw(
-        st.sampled_from(
-            [
-                "successful_request",
-                "authentication_failure",
-                "authorization_failure",
-                "service_error",
-                "rate_limit_exceeded",
-            ]
-        )
+
+@pytest.fixture(scope="module")
+def client():
+    """One test client per module; under xdist each worker builds its own."""
+    return TestClient(app)
+
+
+@pytest.fixture
+def mock_logger(monkeypatch):
+    """Patch the auth middleware logger once per test rather than per example.
+
+    Tests reset the yielded mock at the start of each example instead of
+    opening their own ``patch`` context every time.
+    """
+    logger = MagicMock()
+    monkeypatch.setattr(
+        "services.api_gateway.middleware.auth_middleware.logger", logger
     )
+    yield logger
+
+
+# Endpoints the audit logging tests send requests to
+_ENDPOINTS = [
+    "/api/v1/items/parent",
+    "/api/v1/items/child",
+    "/api/v1/locations",
+    "/api/v1/users",
+    "/api/v1/reports",
+]
+
 
-    return {
-        "scenario_type": scenario_type,
-        "user_agent": draw(st.text(min_size=10, max_size=100)),
-        "client_ip": draw(st.ip_addresses().map(str)),
-    }
+# HTTP methods the audit logging tests send
+_METHODS = ("GET", "POST", "PUT", "DELETE")
+
+
+def _send(client, method, endpoint, headers=None):
+    """Send one request through the client; bodied methods carry an empty JSON body."""
+    body = {} if method in ("POST", "PUT") else None
+    return client.request(method, endpoint, headers=headers, json=body)
+
+
+# Fixed request for the skipped tests; they do not draw examples, so
+# Hypothesis never resolves strategies for tests that cannot run
+_SAMPLE_REQUEST = {
+    "user_id": f"{1:032x}",
+    "username": "auditor",
+    "role": "user",
+    "endpoint": "/api/v1/items/parent",
+}
 
 
 class TestComprehensiveAuditLoggingProperties:
     """Property-based tests for comprehensive audit logging."""
 
-    def setup_method(self):
-        """Set up test client."""
-        self.client = TestClient(app)
-
-    @given(request_data=api_request_data(), audit_data=audit_scenario_data())
-    @settings(max_examples=5, deadline=None)
+    @pytest.mark.parametrize("method", _METHODS)
+    @pytest.mark.parametrize(
+        "scenario_type",
+        ["successful_request", "authentication_failure", "service_error"],
+    )
     @pytest.mark.skip(
         reason="Requires full API gateway infrastructure and logging setup"
     )
-    def test_comprehensive_audit_logging_property(self, request_data, audit_data):
+    def test_comprehensive_audit_logging_property(
+        self, client, scenario_type, method
+    ):
         """
         Property 16: Comprehensive Audit Logging
 
@@ -93,17 +174,13 @@ class TestComprehensiveAuditLoggingProperties:
 
         **Validates: Requirements 7.5, 5.3**
         """
-        scenario_type = audit_data["scenario_type"]
-        method = request_data["method"]
+        request_data = _SAMPLE_REQUEST
         endpoint = request_data["endpoint"]
 
         # Create valid token for authenticated scenarios
-        token_payload = {
-            "sub": request_data["user_id"],
-            "username": request_data["username"],
-            "role": request_data["role"],
-        }
-        valid_token = create_access_token(token_payload)
+        valid_token = _cached_token(
+            request_data["user_id"], request_data["username"], request_data["role"]
+        )
 
         # Patch the logger to capture log calls
         with patch(
@@ -112,52 +189,30 @@ class TestComprehensiveAuditLoggingProperties:
             if scenario_type == "successful_request":
                 # Mock successful microservice response
                 with patch("httpx.AsyncClient.request") as mock_request:
-                    mock_response = MagicMock()
-                    mock_response.status_code = 200
-                    mock_response.json.return_value = {"status": "success"}
-                    mock_response.content = b'{"status": "success"}'
-                    mock_response.headers = {"content-type": "application/json"}
-                    mock_request.return_value = mock_response
+                    mock_request.return_value = _SUCCESS_RESPONSE
 
                     headers = {
                         "Authorization": f"Bearer {valid_token}",
-                        "User-Agent": audit_data["user_agent"],
+                        "User-Agent": "TestClient/1.0",
                     }
 
                     # Make request
-                    if method == "GET":
-                        _ = self.client.get(endpoint, headers=headers)
-                    elif method == "POST":
-                        _ = self.client.post(endpoint, headers=headers, json={})
-                    elif method == "PUT":
-                        _ = self.client.put(endpoint, headers=headers, json={})
-                    elif method == "DELETE":
-                        _ = self.client.delete(endpoint, headers=headers)
+                    _ = _send(client, method, endpoint, headers)
 
                     # Verify comprehensive logging occurred
                     assert (
                         mock_logger.info.call_count >= 3
                     )  # At least: request received, auth successful, request completed
 
-                    # Check for required log entries
+                    # Should log request received, authentication successful
+                    # and request completed
                     log_calls = mock_logger.info.call_args_list
-                    log_messages = [call[0][0] for call in log_calls]
-
-                    # Should log request received
-                    assert any(
-                        "request received" in msg.lower() for msg in log_messages
-                    )
-
-                    # Should log authentication successful
-                    assert any(
-                        "authentication successful" in msg.lower()
-                        for msg in log_messages
-                    )
-
-                    # Should log request completed
-                    assert any(
-                        "request completed" in msg.lower() for msg in log_messages
-                    )
+                    expected = {
+                        "request received",
+                        "authentication successful",
+                        "request completed",
+                    }
+                    assert _logged_messages(log_calls, expected) == expected
 
                     # Verify user context is logged
                     user_context_logged = False
@@ -176,22 +231,15 @@ class TestComprehensiveAuditLoggingProperties:
 
             elif scenario_type == "authentication_failure":
                 # Test authentication failure logging
-                _ = self.client.get(endpoint)
+                _ = client.get(endpoint)
 
                 # Should log authentication failure
                 assert mock_logger.warning.call_count >= 1
 
-                warning_calls = mock_logger.warning.call_args_list
-                warning_messages = [call[0][0] for call in warning_calls]
-
-                # Should log authentication failure
-                assert any(
-                    "authentication failed" in msg.lower() for msg in warning_messages
-                )
-
-                # Should include path and client IP in logs
+                # Should log authentication failure with path and client IP;
+                # the loop below also covers the message-only check
                 auth_failure_logged = False
-                for call in warning_calls:
+                for call in mock_logger.warning.call_args_list:
                     args, kwargs = call
                     if "authentication failed" in args[0].lower():
                         assert "path" in kwargs
@@ -209,7 +257,7 @@ class TestComprehensiveAuditLoggingProperties:
                     mock_request.side_effect = Exception("Service connection failed")
 
                     headers = {"Authorization": f"Bearer {valid_token}"}
-                    _ = self.client.get(endpoint, headers=headers)
+                    _ = client.get(endpoint, headers=headers)
 
                     # Should log the error
                     assert mock_logger.error.call_count >= 1
@@ -230,131 +278,92 @@ class TestComprehensiveAuditLoggingProperties:
                         service_error_logged
                     ), "Service errors should be logged with user context"
 
-    @given(request_data=api_request_data())
-    @settings(max_examples=5, deadline=None)
-    def test_request_timing_audit_logging(self, request_data):
-        """
-        Property: Request timing should be logged for performance auditing
-
-        For any API request, processing time should be logged for performance monitoring.
-        """
-        # Create valid token
-        token_payload = {
-            "sub": request_data["user_id"],
-            "username": request_data["username"],
-            "role": request_data["role"],
-        }
-        valid_token = create_access_token(token_payload)
-        headers = {"Authorization": f"Bearer {valid_token}"}
-
-        # Mock successful microservice response
-        with patch("httpx.AsyncClient.request") as mock_request:
-            mock_response = MagicMock()
-            mock_response.status_code = 200
-            mock_response.json.return_value = {"status": "success"}
-            mock_response.content = b'{"status": "success"}'
-            mock_response.headers = {"content-type": "application/json"}
-            mock_request.return_value = mock_response
-
-            # Patch the logger to capture log calls
-            with patch(
-                "services.api_gateway.middleware.auth_middleware.logger"
-            ) as mock_logger:
-                _ = self.client.get(request_data["endpoint"], headers=headers)
-
-                # Should log processing time
-                timing_logged = False
-                for call in mock_logger.info.call_args_list:
-                    args, kwargs = call
-                    if (
-                        "request completed" in args[0].lower()
-                        and "processing_time_ms" in kwargs
-                    ):
-                        assert isinstance(kwargs["processing_time_ms"], (int, float))
-                        assert kwargs["processing_time_ms"] >= 0
-                        timing_logged = True
-                        break
-
-                assert (
-                    timing_logged
-                ), "Processing time should be logged for performance auditing"
-
-    @given(request_data=api_request_data())
-    @settings(max_examples=5, deadline=None)
-    def test_security_context_audit_logging(self, request_data):
+    @given(method=st.sampled_from(_METHODS), endpoint=st.sampled_from(_ENDPOINTS))
+    @audit_settings
+    def test_audit_logging_invariants(self, mock_logger, method, endpoint):
         """
-        Property: Security context should be logged for all requests
+        Property: Every logged request carries timing, security context and a
+        structured format
 
-        For any API request, security-relevant information should be logged.
+        For any API request, processing time should be logged for performance
+        monitoring, security-relevant information should be logged, and every
+        log entry should follow a consistent structured format. All three are
+        checked against the log calls of a single request.
         """
-        # Create valid token
-        token_payload = {
-            "sub": request_data["user_id"],
-            "username": request_data["username"],
-            "role": request_data["role"],
+        # Token claims are never compared here, so the shared token suffices
+        valid_token = _TEST_USER_TOKEN
+
+        # The logger patch outlives a single example, so drop earlier calls
+        mock_logger.reset_mock()
+
+        # Only the middleware's logging is under test, so skip routing and
+        # the proxied service call
+        headers = {
+            "Authorization": f"Bearer {valid_token}",
+            "User-Agent": "TestClient/1.0",
+            "X-Forwarded-For": "192.168.1.100",
         }
-        valid_token = create_access_token(token_payload)
-
-        # Mock successful microservice response
-        with patch("httpx.AsyncClient.request") as mock_request:
-            mock_response = MagicMock()
-            mock_response.status_code = 200
-            mock_response.json.return_value = {"status": "success"}
-            mock_response.content = b'{"status": "success"}'
-            mock_response.headers = {"content-type": "application/json"}
-            mock_request.return_value = mock_response
-
-            # Patch the logger to capture log calls
-            with patch(
-                "services.api_gateway.middleware.auth_middleware.logger"
-            ) as mock_logger:
-                headers = {
-                    "Authorization": f"Bearer {valid_token}",
-                    "User-Agent": "TestClient/1.0",
-                    "X-Forwarded-For": "192.168.1.100",
-                }
-
-                _ = self.client.get(request_data["endpoint"], headers=headers)
 
-                # Should log security context
-                security_context_logged = False
-                for call in mock_logger.info.call_args_list:
-                    args, kwargs = call
-                    if "request received" in args[0].lower():
-                        # Should include method, URL, path, client IP, user agent
-                        assert "method" in kwargs
-                        assert "url" in kwargs
-                        assert "path" in kwargs
-                        assert "client_ip" in kwargs
-                        assert "user_agent" in kwargs
-
-                        assert kwargs["method"] == "GET"
-                        assert request_data["endpoint"] in kwargs["path"]
-                        security_context_logged = True
-                        break
-
-                assert (
-                    security_context_logged
-                ), "Security context should be logged for all requests"
-
-    @given(request_data=api_request_data())
-    @settings(max_examples=5, deadline=None)
+        _run_middleware(method, endpoint, headers)
+
+        # Check timing, security context and structure in one pass
+        timing_logged = False
+        security_context_logged = False
+        for args, kwargs in mock_logger.info.call_args_list:
+            # Should have a descriptive message as first argument
+            assert len(args) >= 1
+            assert isinstance(args[0], str)
+            assert len(args[0]) > 0
+            message = args[0].lower()
+
+            # Should have structured data as keyword arguments
+            if "request received" in message:
+                # Should include method, URL, path, client IP, user agent
+                for field in ("method", "url", "path", "client_ip", "user_agent"):
+                    assert field in kwargs, f"Missing required field: {field}"
+
+                assert kwargs["method"] == method
+                assert endpoint in kwargs["path"]
+                security_context_logged = True
+
+            elif "authentication successful" in message:
+                # Authentication logs should have user context
+                for field in ("user_id", "user_role", "path"):
+                    assert field in kwargs, f"Missing required field: {field}"
+
+            elif "request completed" in message:
+                # Completion logs should have timing and status
+                for field in ("method", "path", "status_code", "processing_time_ms"):
+                    assert field in kwargs, f"Missing required field: {field}"
+
+                assert kwargs["method"] == method
+                assert isinstance(kwargs["processing_time_ms"], (int, float))
+                assert kwargs["processing_time_ms"] >= 0
+                timing_logged = True
+
+        assert (
+            timing_logged
+        ), "Processing time should be logged for performance auditing"
+        assert (
+            security_context_logged
+        ), "Security context should be logged for all requests"
+
+    @pytest.mark.parametrize("method", _METHODS)
     @pytest.mark.skip(
         reason="Requires full API gateway infrastructure and logging setup"
     )
-    def test_error_audit_logging_completeness(self, request_data):
+    def test_error_audit_logging_completeness(self, client, method):
         """
         Property: Error scenarios should be comprehensively logged
 
         For any error scenario, complete context should be logged for troubleshooting.
         """
+        request_data = _SAMPLE_REQUEST
+
         # Create valid token
-        token_payload = {
-            "sub": request_data["user_id"],
-            "username": request_data["username"],
-            "role": request_data["role"],
-        }
-        valid_token = create_access_token(token_payload)
+        valid_token = _cached_token(
+            request_data["user_id"], request_data["username"], request_data["role"]
+        )
         headers = {"Authorization": f"Bearer {valid_token}"}
 
         # Mock service error
@@ -365,7 +374,7 @@ class TestComprehensiveAuditLoggingProperties:
             with patch(
                 "services.api_gateway.middleware.auth_middleware.logger"
             ) as mock_logger:
-                _ = self.client.get(request_data["endpoint"], headers=headers)
+                _ = _send(client, method, request_data["endpoint"], headers)
 
                 # Should log error with complete context
                 error_context_logged = False
@@ -379,7 +388,7 @@ class TestComprehensiveAuditLoggingProperties:
                         assert "processing_time_ms" in kwargs
                         assert "user_id" in kwargs
 
-                        assert kwargs["method"] == "GET"
+                        assert kwargs["method"] == method
                         assert kwargs["path"] == request_data["endpoint"]
                         assert kwargs["user_id"] == request_data["user_id"]
                         assert isinstance(kwargs["processing_time_ms"], (int, float))
@@ -390,7 +399,8 @@ class TestComprehensiveAuditLoggingProperties:
                     error_context_logged
                 ), "Error scenarios should be logged with complete context"
 
-    def test_public_endpoint_audit_logging(self):
+    @pytest.mark.parametrize("method", _METHODS)
+    def test_public_endpoint_audit_logging(self, method):
         """
         Property: Public endpoints should also be logged for audit purposes
 
@@ -403,7 +413,7 @@ class TestComprehensiveAuditLoggingProperties:
             with patch(
                 "services.api_gateway.middleware.auth_middleware.logger"
             ) as mock_logger:
-                self.client.get(endpoint)
+                _run_middleware(method, endpoint)
 
                 # Should log request received for public endpoints
                 request_logged = False
@@ -413,7 +423,7 @@ class TestComprehensiveAuditLoggingProperties:
                         assert "method" in kwargs
                         assert "path" in kwargs
                         assert "client_ip" in kwargs
-                        assert kwargs["method"] == "GET"
+                        assert kwargs["method"] == method
                         assert kwargs["path"] == endpoint
                         request_logged = True
                         break
@@ -422,36 +432,30 @@ class TestComprehensiveAuditLoggingProperties:
                     request_logged
                 ), f"Public endpoint {endpoint} should be logged for audit purposes"
 
-    @given(
-        invalid_token=st.text(min_size=1, max_size=100),
-        endpoint=st.sampled_from(["/api/v1/items/parent", "/api/v1/locations"]),
-    )
-    @settings(max_examples=5, deadline=None)
+    @pytest.mark.parametrize("endpoint", ["/api/v1/items/parent", "/api/v1/locations"])
     @pytest.mark.skip(
         reason="Requires full API gateway infrastructure and logging setup"
     )
-    def test_invalid_authentication_audit_logging(self, invalid_token, endpoint):
+    def test_invalid_authentication_audit_logging(self, client, endpoint):
         """
         Property: Invalid authentication attempts should be logged for security monitoring
 
         For any invalid authentication attempt, security-relevant details should be logged.
         """
-        headers = {"Authorization": f"Bearer {invalid_token}"}
+        headers = {"Authorization": "Bearer not-a-valid-token"}
 
         # Patch the logger to capture log calls
         with patch(
             "services.api_gateway.middleware.auth_middleware.logger"
         ) as mock_logger:
-            _ = self.client.get(endpoint, headers=headers)
+            _ = client.get(endpoint, headers=headers)
 
             # Should log authentication failure
             auth_failure_logged = False
             for call in mock_logger.warning.call_args_list:
                 args, kwargs = call
-                if (
-                    "authentication failed" in args[0].lower()
-                    and "invalid token" in args[0].lower()
-                ):
+                message = args[0].lower()
+                if "authentication failed" in message and "invalid token" in message:
                     assert "path" in kwargs
                     assert "client_ip" in kwargs
                     assert kwargs["path"] == endpoint
@@ -461,73 +465,3 @@ class TestComprehensiveAuditLoggingProperties:
             assert (
                 auth_failure_logged
             ), "Invalid authentication attempts should be logged for security monitoring"
-
-    @given(request_data=api_request_data())
-    @settings(max_examples=5, deadline=None)
-    def test_structured_logging_format(self, request_data):
-        """
-        Property: All audit logs should follow a structured format
-
-        For any logged event, the log should follow a consistent structured format.
-        """
-        # Create valid token
-        token_payload = {
-            "sub": request_data["user_id"],
-            "username": request_data["username"],
-            "role": request_data["role"],
-        }
-        valid_token = create_access_token(token_payload)
-        headers = {"Authorization": f"Bearer {valid_token}"}
-
-        # Mock successful microservice response
-        with patch("httpx.AsyncClient.request") as mock_request:
-            mock_response = MagicMock()
-            mock_response.status_code = 200
-            mock_response.json.return_value = {"status": "success"}
-            mock_response.content = b'{"status": "success"}'
-            mock_response.headers = {"content-type": "application/json"}
-            mock_request.return_value = mock_response
-
-            # Patch the logger to capture log calls
-            with patch(
-                "services.api_gateway.middleware.auth_middleware.logger"
-            ) as mock_logger:
-                _ = self.client.get(request_data["endpoint"], headers=headers)
-
-                # Verify structured logging format
-                for call in mock_logger.info.call_args_list:
-                    args, kwargs = call
-
-                    # Should have a descriptive message as first argument
-                    assert len(args) >= 1
-                    assert isinstance(args[0], str)
-                    assert len(args[0]) > 0
-
-                    # Should have structured data as keyword arguments
-                    if "request received" in args[0].lower():
-                        # Request received logs should have standard fields
-                        required_fields = [
-                            "method",
-                            "url",
-                            "path",
-                            "client_ip",
-                        ]
-                        for field in required_fields:
-                            assert field in kwargs, f"Missing required field: {field}"
-
-                    elif "authentication successful" in args[0].lower():
-                        # Authentication logs should have user context
-                        required_fields = ["user_id", "user_role", "path"]
-                        for field in required_fields:
-                            assert field in kwargs, f"Missing required field: {field}"
-
-                    elif "request completed" in args[0].lower():
-                        # Completion logs should have timing and status
-                        required_fields = [
-                            "method",
-                            "path",
-                            "status_code",
-                            "processing_time_ms",
-                        ]
-                        for field in required_fields:
-                            assert field in kwargs, f"Missing required field: {field}"
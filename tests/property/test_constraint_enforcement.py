@@ -4,13 +4,14 @@ Feature: inventory-management, Property 9: Constraint Enforcement
 Validates: Requirements 4.4, 4.5, 8.4
 """
 
+import itertools
 import uuid
+from contextlib import contextmanager
 
-from hypothesis import HealthCheck, given, settings
-from hypothesis import strategies as st
-from sqlalchemy import create_engine, event
+import pytest
+from sqlalchemy import bindparam, create_engine, event, select
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session
 from sqlalchemy.pool import StaticPool
 
 from shared.models import (
@@ -25,89 +26,185 @@ from shared.models import (
 )
 
 
+# Test database setup
+engine = create_engine(
+    "sqlite:///:memory:",
+    connect_args={"check_same_thread": False},
+    poolclass=StaticPool,
+)
+
+
+# pysqlite defers BEGIN on its own, which breaks SAVEPOINT handling; let
+# SQLAlchemy emit it so examples can roll back their nested transactions
+@event.listens_for(engine, "connect")
+def _disable_pysqlite_transactions(dbapi_connection, connection_record):
+    dbapi_connection.isolation_level = None
+
+
+@event.listens_for(engine, "begin")
+def _emit_begin(conn):
+    conn.exec_driver_sql("BEGIN")
+
+
+# Enable foreign key constraints in SQLite; the database is throwaway, so
+# also skip durability work on every commit
+@event.listens_for(engine, "connect")
+def set_sqlite_pragma(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    for pragma in (
+        "foreign_keys=ON",
+        "journal_mode=MEMORY",
+        "synchronous=OFF",
+        "temp_store=MEMORY",
+    ):
+        cursor.execute(f"PRAGMA {pragma}")
+    cursor.close()
+
+
+# Every example is rolled back, so ids only need to be unique within the
+# process; a counter avoids an os.urandom read per uuid4()
+_id = itertools.count(1)
+
+
+def _uuid():
+    """Return the next sequential UUID."""
+    return uuid.UUID(int=next(_id))
+
+
+# Names for the entities created only to be deleted again. The deletion
+# outcome does not depend on them, so they are fixed rather than drawn.
+UNUSED_LOCATION_TYPE_NAME = "TestLocationType_unused"
+UNUSED_ITEM_TYPE_NAME = "TestItemType_unused"
+
+
+# Statements reused by every run, built once; the deletes take a bound id
+_DELETE_BY_ID = {
+    model: model.__table__.delete().where(model.__table__.c.id == bindparam("id"))
+    for model in (Location, LocationType, ItemType)
+}
+_SELECT_UNUSED_LOCATION_TYPE = select(LocationType).where(
+    LocationType.name == UNUSED_LOCATION_TYPE_NAME
+)
+_SELECT_UNUSED_ITEM_TYPE = select(ItemType).where(
+    ItemType.name == UNUSED_ITEM_TYPE_NAME
+)
+
+
+@pytest.fixture(scope="module", autouse=True)
+def test_database():
+    """Create the schema once for every example in this module."""
+    Base.metadata.create_all(bind=engine)
+    yield
+    Base.metadata.drop_all(bind=engine)
+
+
+@contextmanager
 def get_test_session():
-    """Create a fresh test database session for each test."""
-    engine = create_engine(
-        "sqlite:///:memory:",
-        connect_args={"check_same_thread": False},
-        poolclass=StaticPool,
+    """Yield a session whose writes are rolled back when the example ends.
+
+    The session joins an outer transaction on its own connection, so its
+    ``commit()`` and ``rollback()`` calls only act on savepoints and the
+    schema is never rebuilt.
+    """
+    connection = engine.connect()
+    transaction = connection.begin()
+    # The tests flush and commit explicitly, so skip autoflush before queries
+    session = Session(
+        bind=connection, autoflush=False, join_transaction_mode="create_savepoint"
     )
+    try:
+        yield session
+    finally:
+        session.close()
+        transaction.rollback()
+        connection.close()
 
-    # Enable foreign key constraints in SQLite
-    @event.listens_for(engine, "connect")
-    def set_sqlite_pragma(dbapi_connection, connection_record):
-        cursor = dbapi_connection.cursor()
-        cursor.execute("PRAGMA foreign_keys=ON")
-        cursor.close()
 
-    Base.metadata.create_all(bind=engine)
-    SessionLocal = sessionmaker(bind=engine)
-    return SessionLocal(), engine
+def _assert_delete_fails(session, model, row_id, message):
+    """Assert the database rejects deleting a row that others still reference.
+
+    The probe only needs the DELETE to be refused, so it issues the Core
+    statement and skips the ORM's cascade and unit-of-work handling. It runs
+    in a savepoint, so only the rejected statement is rolled back.
+    """
+    try:
+        with session.begin_nested():
+            session.execute(_DELETE_BY_ID[model], {"id": row_id})
+    except IntegrityError:
+        return
+    raise AssertionError(message)
 
 
 def create_test_data(session):
     """Create minimal test data required for property tests."""
     # Create role
     role = Role(
-        id=uuid.uuid4(),
-        sku="test_role",
+        id=_uuid(),
+        name="test_role",
         description="Test role",
         permissions={},
     )
-    session.add(role)
 
     # Create user
     user = User(
-        id=uuid.uuid4(),
+        id=_uuid(),
         username="test_user",
         email="test@example.com",
         password_hash="hashed_password",
         active=True,
         role_id=role.id,
     )
-    session.add(user)
 
     # Create location type
     location_type = LocationType(
-        id=uuid.uuid4(), name="warehouse", description="Warehouse location"
+        id=_uuid(), name="warehouse", description="Warehouse location"
     )
-    session.add(location_type)
 
     # Create location
     location = Location(
-        id=uuid.uuid4(),
-        sku="Test Location",
+        id=_uuid(),
+        name="Test Location",
         description="Test location",
         location_type_id=location_type.id,
     )
-    session.add(location)
 
     # Create item types
     parent_item_type = ItemType(
-        id=uuid.uuid4(),
-        sku="parent_item_type",
+        id=_uuid(),
+        name="parent_item_type",
         description="Parent item type",
         category=ItemCategory.PARENT,
     )
     child_item_type = ItemType(
-        id=uuid.uuid4(),
-        sku="child_item_type",
+        id=_uuid(),
+        name="child_item_type",
         description="Child item type",
         category=ItemCategory.CHILD,
     )
-    session.add_all([parent_item_type, child_item_type])
 
     # Create parent item
     parent_item = ParentItem(
-        id=uuid.uuid4(),
+        id=_uuid(),
         sku="Test Parent Item",
         description="Test parent item",
         item_type_id=parent_item_type.id,
         current_location_id=location.id,
         created_by=user.id,
     )
-    session.add(parent_item)
 
+    # One flush inserts every row; ids are assigned up front, so the unit of
+    # work only has to order the tables
+    session.add_all(
+        [
+            role,
+            user,
+            location_type,
+            location,
+            parent_item_type,
+            child_item_type,
+            parent_item,
+        ]
+    )
     session.commit()
     return (
         user,
@@ -119,19 +216,7 @@ def create_test_data(session):
     )
 
 
-@given(
-    location_name=st.text(min_size=1, max_size=50),
-    location_type_name=st.text(min_size=1, max_size=50),
-    item_type_name=st.text(min_size=1, max_size=50),
-)
-@settings(
-    max_examples=5,
-    deadline=None,
-    suppress_health_check=[HealthCheck.function_scoped_fixture],
-)
-def test_constraint_enforcement_property(
-    location_name, location_type_name, item_type_name
-):
+def test_constraint_enforcement_property():
     """
     Property 9: Constraint Enforcement
 
@@ -140,9 +225,7 @@ def test_constraint_enforcement_property(
 
     **Validates: Requirements 4.4, 4.5, 8.4**
     """
-    session, engine = get_test_session()
-
-    try:
+    with get_test_session() as session:
         # Create test data
         (
             user,
@@ -155,45 +238,37 @@ def test_constraint_enforcement_property(
 
         # Test 1: Deleting location with assigned items should fail (Requirement 4.4)
         # The location has a parent item assigned to it
-        try:
-            session.delete(location)
-            session.commit()
-            # If we reach here, the constraint was not enforced
-            assert (
-                False
-            ), "Expected IntegrityError when deleting location with assigned items"
-        except IntegrityError:
-            # This is expected - constraint enforced
-            session.rollback()
+        _assert_delete_fails(
+            session,
+            Location,
+            location.id,
+            "Expected IntegrityError when deleting location with assigned items",
+        )
 
         # Test 2: Deleting location type with locations using it should fail (Requirement 4.5)
         # The location_type is being used by the location
-        try:
-            session.delete(location_type)
-            session.commit()
-            # If we reach here, the constraint was not enforced
-            assert False, "Expected IntegrityError when deleting location type in use"
-        except IntegrityError:
-            # This is expected - constraint enforced
-            session.rollback()
+        _assert_delete_fails(
+            session,
+            LocationType,
+            location_type.id,
+            "Expected IntegrityError when deleting location type in use",
+        )
 
         # Test 3: Deleting item type with items using it should fail (Requirement 8.4)
         # The parent_item_type is being used by the parent_item
-        try:
-            session.delete(parent_item_type)
-            session.commit()
-            # If we reach here, the constraint was not enforced
-            assert False, "Expected IntegrityError when deleting item type in use"
-        except IntegrityError:
-            # This is expected - constraint enforced
-            session.rollback()
+        _assert_delete_fails(
+            session,
+            ItemType,
+            parent_item_type.id,
+            "Expected IntegrityError when deleting item type in use",
+        )
 
         # Test 4: Create additional entities to test more constraint scenarios
 
         # Create another location type that's not in use
         unused_location_type = LocationType(
-            id=uuid.uuid4(),
-            sku=location_type_name + "_unused",
+            id=_uuid(),
+            name=UNUSED_LOCATION_TYPE_NAME,
             description="Unused location type",
         )
         session.add(unused_location_type)
@@ -201,8 +276,8 @@ def test_constraint_enforcement_property(
 
         # Create another item type that's not in use
         unused_item_type = ItemType(
-            id=uuid.uuid4(),
-            sku=item_type_name + "_unused",
+            id=_uuid(),
+            name=UNUSED_ITEM_TYPE_NAME,
             description="Unused item type",
             category=ItemCategory.PARENT,
         )
@@ -216,11 +291,9 @@ def test_constraint_enforcement_property(
         session.commit()
 
         # Verify it was deleted
-        deleted_location_type = (
-            session.query(LocationType)
-            .filter_by(name=location_type_name + "_unused")
-            .first()
-        )
+        deleted_location_type = session.execute(
+            _SELECT_UNUSED_LOCATION_TYPE
+        ).scalar_one_or_none()
         assert deleted_location_type is None, "Unused location type should be deleted"
 
         # Delete unused item type should work
@@ -228,9 +301,9 @@ def test_constraint_enforcement_property(
         session.commit()
 
         # Verify it was deleted
-        deleted_item_type = (
-            session.query(ItemType).filter_by(name=item_type_name + "_unused").first()
-        )
+        deleted_item_type = session.execute(
+            _SELECT_UNUSED_ITEM_TYPE
+        ).scalar_one_or_none()
         assert deleted_item_type is None, "Unused item type should be deleted"
 
         # Test 6: After removing dependencies, deletion should be allowed
@@ -244,7 +317,7 @@ def test_constraint_enforcement_property(
         session.commit()
 
         # Verify location was deleted
-        deleted_location = session.query(Location).filter_by(id=location.id).first()
+        deleted_location = session.get(Location, location.id)
         assert (
             deleted_location is None
         ), "Location should be deleted after removing dependencies"
@@ -254,36 +327,19 @@ def test_constraint_enforcement_property(
         session.commit()
 
         # Verify location type was deleted
-        deleted_location_type = (
-            session.query(LocationType).filter_by(id=location_type.id).first()
-        )
+        deleted_location_type = session.get(LocationType, location_type.id)
         assert (
             deleted_location_type is None
         ), "Location type should be deleted after removing dependencies"
 
-        session.close()
-
-    finally:
-        session.close()
-        Base.metadata.drop_all(bind=engine)
-        engine.dispose()
 
-
-@given(location_name=st.text(min_size=1, max_size=50))
-@settings(
-    max_examples=3,
-    deadline=None,
-    suppress_health_check=[HealthCheck.function_scoped_fixture],
-)
-def test_location_deletion_with_items_constraint(location_name):
+def test_location_deletion_with_items_constraint():
     """
     Test specific constraint: locations with items cannot be deleted.
 
     **Validates: Requirement 4.4**
     """
-    session, engine = get_test_session()
-
-    try:
+    with get_test_session() as session:
         # Create test data
         (
             user,
@@ -300,40 +356,25 @@ def test_location_deletion_with_items_constraint(location_name):
         # Try to delete the location - should fail
         try:
             session.delete(location)
-            session.commit()
+            session.flush()
             assert False, "Should not be able to delete location with items"
         except IntegrityError:
             session.rollback()
 
         # Verify location still exists
-        existing_location = session.query(Location).filter_by(id=location.id).first()
+        existing_location = session.get(Location, location.id)
         assert (
             existing_location is not None
         ), "Location should still exist after failed deletion"
 
-        session.close()
-
-    finally:
-        session.close()
-        Base.metadata.drop_all(bind=engine)
-        engine.dispose()
 
-
-@given(item_type_name=st.text(min_size=1, max_size=50))
-@settings(
-    max_examples=3,
-    deadline=None,
-    suppress_health_check=[HealthCheck.function_scoped_fixture],
-)
-def test_item_type_deletion_with_items_constraint(item_type_name):
+def test_item_type_deletion_with_items_constraint():
     """
     Test specific constraint: item types in use cannot be deleted.
 
     **Validates: Requirement 8.4**
     """
-    session, engine = get_test_session()
-
-    try:
+    with get_test_session() as session:
         # Create test data
         (
             user,
@@ -350,32 +391,22 @@ def test_item_type_deletion_with_items_constraint(item_type_name):
         # Try to delete the item type - should fail
         try:
             session.delete(parent_item_type)
-            session.commit()
+            session.flush()
             assert False, "Should not be able to delete item type in use"
         except IntegrityError:
             session.rollback()
 
         # Verify item type still exists
-        existing_item_type = (
-            session.query(ItemType).filter_by(id=parent_item_type.id).first()
-        )
+        existing_item_type = session.get(ItemType, parent_item_type.id)
         assert (
             existing_item_type is not None
         ), "Item type should still exist after failed deletion"
 
-        session.close()
-
-    finally:
-        session.close()
-        Base.metadata.drop_all(bind=engine)
-        engine.dispose()
-
 
 if __name__ == "__main__":
     # Run simple tests to verify the properties work
-    test_constraint_enforcement_property(
-        "TestLocation", "TestLocationType", "TestItemType"
-    )
-    test_location_deletion_with_items_constraint("TestLocation")
-    test_item_type_deletion_with_items_constraint("TestItemType")
+    Base.metadata.create_all(bind=engine)
+    test_constraint_enforcement_property()
+    test_location_deletion_with_items_constraint()
+    test_item_type_deletion_with_items_constraint()
     print("Constraint enforcement property tests passed!")
@@ -4,12 +4,15 @@ Feature: inventory-management, Property 3: Cascading Item Movement
 Validates: Requirements 2.2, 9.3
 """
 
+import itertools
 import uuid
+from contextlib import contextmanager
 
+import pytest
 from hypothesis import HealthCheck, given, settings
 from hypothesis import strategies as st
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import create_engine, event, insert, select
+from sqlalchemy.orm import Session, joinedload
 from sqlalchemy.pool import StaticPool
 
 from shared.models import (
@@ -25,77 +28,160 @@ from shared.models import (
 )
 
 
-def get_test_session():
-    """Create a fresh test database session for each test."""
-    engine = create_engine(
-        "sqlite:///:memory:",
-        connect_args={"check_same_thread": False},
-        poolclass=StaticPool,
-    )
+# Test database setup
+engine = create_engine(
+    "sqlite:///:memory:",
+    connect_args={"check_same_thread": False},
+    poolclass=StaticPool,
+)
+
+
+# pysqlite defers BEGIN on its own, which breaks SAVEPOINT handling; let
+# SQLAlchemy emit it so examples can roll back their nested transactions
+@event.listens_for(engine, "connect")
+def _disable_pysqlite_transactions(dbapi_connection, connection_record):
+    dbapi_connection.isolation_level = None
+
+
+@event.listens_for(engine, "begin")
+def _emit_begin(conn):
+    conn.exec_driver_sql("BEGIN")
+
+
+# Throwaway in-memory database: skip durability work on every commit
+@event.listens_for(engine, "connect")
+def set_sqlite_pragma(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    for pragma in ("journal_mode=MEMORY", "synchronous=OFF", "temp_store=MEMORY"):
+        cursor.execute(f"PRAGMA {pragma}")
+    cursor.close()
+
+
+# Every example is rolled back, so ids only need to be unique within the
+# process; a counter avoids an os.urandom read per uuid4()
+_id = itertools.count(1)
+
+
+def _uuid():
+    """Return the next sequential UUID."""
+    return uuid.UUID(int=next(_id))
+
+
+@pytest.fixture(scope="module", autouse=True)
+def test_database():
+    """Create the schema once for every example in this module."""
     Base.metadata.create_all(bind=engine)
-    SessionLocal = sessionmaker(bind=engine)
-    return SessionLocal(), engine
+    yield
+    Base.metadata.drop_all(bind=engine)
+
+
+@contextmanager
+def get_test_session():
+    """Yield a session whose writes are rolled back when the example ends.
+
+    The session joins an outer transaction on its own connection, so its
+    ``commit()`` calls only release savepoints and the schema is never rebuilt.
+    """
+    connection = engine.connect()
+    transaction = connection.begin()
+    session = Session(bind=connection, join_transaction_mode="create_savepoint")
+    try:
+        yield session
+    finally:
+        session.close()
+        transaction.rollback()
+        connection.close()
 
 
 def create_test_data(session):
-    """Create minimal test data required for property tests."""
-    # Create role
-    role = Role(
-        id=uuid.uuid4(),
-        sku="test_role",
-        description="Test role",
-        permissions={},
-    )
-    session.add(role)
-
-    # Create user
-    user = User(
-        id=uuid.uuid4(),
-        username="test_user",
-        email="test@example.com",
-        password_hash="hashed_password",
-        active=True,
-        role_id=role.id,
-    )
-    session.add(user)
+    """Create minimal test data required for property tests.
 
-    # Create location type
-    location_type = LocationType(
-        id=uuid.uuid4(), name="warehouse", description="Warehouse location"
+    Rows go in as one multi-row INSERT per table, in dependency order; only
+    their ids are returned since the tests never mutate them.
+    """
+    role_id, user_id, location_type_id = _uuid(), _uuid(), _uuid()
+    location1_id, location2_id = _uuid(), _uuid()
+    item_type_id, child_item_type_id = _uuid(), _uuid()
+
+    session.execute(
+        insert(Role),
+        [
+            {
+                "id": role_id,
+                "name": "test_role",
+                "description": "Test role",
+                "permissions": {},
+            }
+        ],
+    )
+    session.execute(
+        insert(User),
+        [
+            {
+                "id": user_id,
+                "username": "test_user",
+                "email": "test@example.com",
+                "password_hash": "hashed_password",
+                "active": True,
+                "role_id": role_id,
+            }
+        ],
     )
-    session.add(location_type)
-
-    # Create locations
-    location1 = Location(
-        id=uuid.uuid4(),
-        sku="Location A",
-        description="First location",
-        location_type_id=location_type.id,
+    session.execute(
+        insert(LocationType),
+        [
+            {
+                "id": location_type_id,
+                "name": "warehouse",
+                "description": "Warehouse location",
+            }
+        ],
     )
-    location2 = Location(
-        id=uuid.uuid4(),
-        sku="Location B",
-        description="Second location",
-        location_type_id=location_type.id,
+    session.execute(
+        insert(Location),
+        [
+            {
+                "id": location1_id,
+                "name": "Location A",
+                "description": "First location",
+                "location_type_id": location_type_id,
+            },
+            {
+                "id": location2_id,
+                "name": "Location B",
+                "description": "Second location",
+                "location_type_id": location_type_id,
+            },
+        ],
     )
-    session.add_all([location1, location2])
-
-    # Create item type
-    item_type = ItemType(
-        id=uuid.uuid4(),
-        sku="test_item_type",
-        description="Test item type",
-        category=ItemCategory.PARENT,
+    session.execute(
+        insert(ItemType),
+        [
+            {
+                "id": item_type_id,
+                "name": "test_item_type",
+                "description": "Test item type",
+                "category": ItemCategory.PARENT,
+            },
+            {
+                "id": child_item_type_id,
+                "name": "child_item_type",
+                "description": "Child item type",
+                "category": ItemCategory.CHILD,
+            },
+        ],
     )
-    session.add(item_type)
 
     session.commit()
-    return user, location1, location2, item_type
+    return user_id, location1_id, location2_id, item_type_id, child_item_type_id
 
 
 @given(
     parent_name=st.text(min_size=1, max_size=50),
-    child_names=st.lists(st.text(min_size=1, max_size=50), min_size=1, max_size=5),
+    # ChildItem.sku is unique, so the drawn child names must be too
+    child_names=st.lists(
+        st.text(min_size=1, max_size=50), min_size=1, max_size=5, unique=True
+    ),
 )
 @settings(
     max_examples=10,
@@ -111,87 +197,91 @@ def test_cascading_item_movement_property(parent_name, child_names):
 
     **Validates: Requirements 2.2, 9.3**
     """
-    session, engine = get_test_session()
-
-    try:
+    with get_test_session() as session:
         # Create test data
-        user, location1, location2, parent_item_type = create_test_data(session)
-
-        # Create child item type
-        child_item_type = ItemType(
-            id=uuid.uuid4(),
-            sku="child_item_type",
-            description="Child item type",
-            category=ItemCategory.CHILD,
-        )
-        session.add(child_item_type)
-        session.commit()
+        (
+            user_id,
+            location1_id,
+            location2_id,
+            parent_item_type_id,
+            child_item_type_id,
+        ) = create_test_data(session)
 
         # Create parent item at location1
+        parent_item_id = _uuid()
         parent_item = ParentItem(
-            id=uuid.uuid4(),
+            id=parent_item_id,
             sku=parent_name,
             description="Test parent item",
-            item_type_id=parent_item_type.id,
-            current_location_id=location1.id,
-            created_by=user.id,
+            item_type_id=parent_item_type_id,
+            current_location_id=location1_id,
+            created_by=user_id,
         )
         session.add(parent_item)
         session.commit()
 
-        # Create child items assigned to parent
-        child_items = []
-        for child_name in child_names:
-            child_item = ChildItem(
-                id=uuid.uuid4(),
-                sku=child_name,
-                description="Test child item",
-                item_type_id=child_item_type.id,
-                parent_item_id=parent_item.id,
-                created_by=user.id,
-            )
-            child_items.append(child_item)
-            session.add(child_item)
-
+        # Create child items assigned to parent in one INSERT, then load them
+        # back as managed instances for the relationship assertions
+        session.execute(
+            insert(ChildItem),
+            [
+                {
+                    "id": _uuid(),
+                    "sku": child_name,
+                    "description": "Test child item",
+                    "item_type_id": child_item_type_id,
+                    "parent_item_id": parent_item.id,
+                    "created_by": user_id,
+                }
+                for child_name in child_names
+            ],
+        )
         session.commit()
+        child_items = session.scalars(
+            select(ChildItem).where(ChildItem.parent_item_id == parent_item.id)
+        ).all()
+        assert len(child_items) == len(child_names)
 
         # Verify initial state: parent is at location1
-        assert parent_item.current_location_id == location1.id
+        assert parent_item.current_location_id == location1_id
 
         # Verify initial state: all child items are conceptually at parent's
         # location
         for child_item in child_items:
             assert child_item.parent_item_id == parent_item.id
             # Child items inherit location from parent
-            assert child_item.parent_item.current_location_id == location1.id
+            assert child_item.parent_item.current_location_id == location1_id
 
         # Move parent item to location2
-        parent_item.current_location_id = location2.id
+        parent_item.current_location_id = location2_id
         session.commit()
 
-        # Refresh objects from database
-        session.refresh(parent_item)
-        for child_item in child_items:
-            session.refresh(child_item)
+        # Reload the parent and every child from the database in one query
+        session.expire_all()
+        child_items = (
+            session.execute(
+                select(ChildItem)
+                .options(joinedload(ChildItem.parent_item))
+                .where(ChildItem.parent_item_id == parent_item_id)
+            )
+            .unique()
+            .scalars()
+            .all()
+        )
+        assert len(child_items) == len(child_names)
 
         # Property verification: parent is now at location2
-        assert parent_item.current_location_id == location2.id
+        assert parent_item.current_location_id == location2_id
 
         # Property verification: all child items are now conceptually at location2
         # (through their parent's location)
         for child_item in child_items:
             assert child_item.parent_item_id == parent_item.id
-            assert child_item.parent_item.current_location_id == location2.id
-
-        session.close()
-
-    finally:
-        session.close()
-        Base.metadata.drop_all(bind=engine)
-        engine.dispose()
+            assert child_item.parent_item.current_location_id == location2_id
 
 
 if __name__ == "__main__":
     # Run a simple test to verify the property works
+    Base.metadata.create_all(bind=engine)
     test_cascading_item_movement_property("TestParent", ["Child1", "Child2"])
     print("Property test passed!")
@@ -10,7 +10,7 @@ Feature: inventory-management
 
 import random
 import uuid
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Set
 
 import pytest
 from hypothesis import assume, given, settings
@@ -30,57 +30,17 @@ from shared.models.move_history import MoveHistory
 from shared.models.user import Role, User
 
 
-# Strategies for generating test data
-@st.composite
-def valid_uuid_string(draw):
-    """Generate valid UUID strings."""
-    return str(uuid.uuid4())
+# Strategies for generating test data. Fixed ASCII regexes keep generation
+# cheap: Hypothesis never walks the Unicode category tables per draw.
+valid_uuid_string = st.uuids().map(str)
 
+# Valid names for entities; the alphabet has no whitespace, so every name is
+# non-blank
+valid_name = st.from_regex(r"[A-Za-z0-9_-]{1,50}", fullmatch=True)
 
-@st.composite
-def valid_name(draw):
-    """Generate valid names for entities."""
-    return draw(
-        st.text(
-            alphabet=st.characters(whitelist_categories=("Lu", "Ll", "Nd", "Pc", "Pd")),
-            min_size=1,
-            max_size=50,
-        ).filter(lambda x: x.strip() and not x.isspace())
-    )
-
-
-@st.composite
-def valid_description(draw):
-    """Generate valid descriptions."""
-    return draw(
-        st.text(
-            alphabet=st.characters(
-                whitelist_categories=("Lu", "Ll", "Nd", "Pc", "Pd", "Po", "Zs")
-            ),
-            min_size=0,
-            max_size=200,
-        )
-    )
+valid_description = st.from_regex(r"[A-Za-z0-9 _.,-]{0,200}", fullmatch=True)
 
-
-@st.composite
-def valid_email(draw):
-    """Generate valid email addresses."""
-    username = draw(
-        st.text(
-            alphabet=st.characters(whitelist_categories=("Lu", "Ll", "Nd")),
-            min_size=1,
-            max_size=20,
-        )
-    )
-    domain = draw(
-        st.text(
-            alphabet=st.characters(whitelist_categories=("Lu", "Ll", "Nd")),
-            min_size=1,
-            max_size=20,
-        )
-    )
-    return f"{username}@{domain}.com"
+valid_email = st.from_regex(r"[A-Za-z0-9]{1,20}@[A-Za-z0-9]{1,20}\.com", fullmatch=True)
 
 
 class InventorySystemStateMachine(RuleBasedStateMachine):
@@ -103,11 +63,31 @@ class InventorySystemStateMachine(RuleBasedStateMachine):
         self.move_history: List[MoveHistory] = []
         self.assignment_history: List[AssignmentHistory] = []
 
+        # Latest history record per entity, kept as records are appended so
+        # the history invariants need not regroup the full lists every step.
+        # The records are never flushed, so moved_at/assigned_at stay unset;
+        # rules run one at a time, so the last record written is the latest.
+        self._last_move: Dict[str, MoveHistory] = {}  # item_id -> move
+        self._last_assignment: Dict[str, AssignmentHistory] = {}  # child_id -> record
+
         # Track system state for invariants
         self.item_locations: Dict[str, str] = {}  # item_id -> location_id
         self.child_assignments: Dict[str, Optional[str]] = {}  # child_id -> parent_id
         self.location_item_counts: Dict[str, int] = {}  # location_id -> count
 
+        # Names already taken, so uniqueness checks are a set lookup rather
+        # than a scan over every entity created so far
+        self._role_names: Set[str] = set()
+        self._usernames: Set[str] = set()
+        self._emails: Set[str] = set()
+        self._location_type_names: Set[str] = set()
+        self._location_names: Set[str] = set()
+        self._item_type_names: Set[str] = set()
+
+        # Item type ids partitioned by category for the item-creation rules
+        self._parent_item_type_ids: List[str] = []
+        self._child_item_type_ids: List[str] = []
+
     # Bundles for managing entity references
     users = Bundle("users")
     roles = Bundle("roles")
@@ -127,10 +107,12 @@ class InventorySystemStateMachine(RuleBasedStateMachine):
             permissions={"read": True, "write": True, "admin": True},
         )
         self.roles[admin_role.id] = admin_role
+        self._role_names.add(admin_role.name)
 
         # Create warehouse location type
         warehouse_type = LocationType(name="Warehouse", description="Storage warehouse")
         self.location_types[warehouse_type.id] = warehouse_type
+        self._location_type_names.add(warehouse_type.name)
 
         # Create basic item types
         parent_item_type = ItemType(
@@ -145,11 +127,14 @@ class InventorySystemStateMachine(RuleBasedStateMachine):
         )
         self.item_types[parent_item_type.id] = parent_item_type
         self.item_types[child_item_type.id] = child_item_type
+        self._item_type_names.update((parent_item_type.name, child_item_type.name))
+        self._parent_item_type_ids.append(parent_item_type.id)
+        self._child_item_type_ids.append(child_item_type.id)
 
-    @rule(target=roles, name=valid_name(), description=valid_description())
+    @rule(target=roles, name=valid_name, description=valid_description)
     def create_role(self, name, description):
         """Create a new role."""
-        assume(name not in [r.name for r in self.roles.values()])
+        assume(name not in self._role_names)
 
         role = Role(
             name=name,
@@ -157,14 +142,15 @@ class InventorySystemStateMachine(RuleBasedStateMachine):
             permissions={"read": True, "write": False},
         )
         self.roles[role.id] = role
+        self._role_names.add(name)
         return role.id
 
-    @rule(target=users, role_id=roles, username=valid_name(), email=valid_email())
+    @rule(target=users, role_id=roles, username=valid_name, email=valid_email)
     def create_user(self, role_id, username, email):
         """Create a new user."""
         assume(role_id in self.roles)
-        assume(username not in [u.username for u in self.users.values()])
-        assume(email not in [u.email for u in self.users.values()])
+        assume(username not in self._usernames)
+        assume(email not in self._emails)
 
         user = User(
             username=username,
@@ -174,31 +160,34 @@ class InventorySystemStateMachine(RuleBasedStateMachine):
             active=True,
         )
         self.users[user.id] = user
+        self._usernames.add(username)
+        self._emails.add(email)
         return user.id
 
     @rule(
         target=location_types,
-        name=valid_name(),
-        description=valid_description(),
+        name=valid_name,
+        description=valid_description,
     )
     def create_location_type(self, name, description):
         """Create a new location type."""
-        assume(name not in [lt.name for lt in self.location_types.values()])
+        assume(name not in self._location_type_names)
 
         location_type = LocationType(name=name, description=description)
         self.location_types[location_type.id] = location_type
+        self._location_type_names.add(name)
         return location_type.id
 
     @rule(
         target=locations,
         location_type_id=location_types,
-        name=valid_name(),
-        description=valid_description(),
+        name=valid_name,
+        description=valid_description,
     )
     def create_location(self, location_type_id, name, description):
         """Create a new location."""
         assume(location_type_id in self.location_types)
-        assume(name not in [loc.name for loc in self.locations.values()])
+        assume(name not in self._location_names)
 
         location = Location(
             name=name,
@@ -207,26 +196,32 @@ class InventorySystemStateMachine(RuleBasedStateMachine):
         )
         self.locations[location.id] = location
         self.location_item_counts[location.id] = 0
+        self._location_names.add(name)
         return location.id
 
     @rule(
         target=item_types,
-        name=valid_name(),
-        description=valid_description(),
+        name=valid_name,
+        description=valid_description,
         category=st.sampled_from(list(ItemCategory)),
     )
     def create_item_type(self, name, description, category):
         """Create a new item type."""
-        assume(name not in [it.name for it in self.item_types.values()])
+        assume(name not in self._item_type_names)
 
         item_type = ItemType(name=name, description=description, category=category)
         self.item_types[item_type.id] = item_type
+        self._item_type_names.add(name)
+        if category == ItemCategory.PARENT:
+            self._parent_item_type_ids.append(item_type.id)
+        elif category == ItemCategory.CHILD:
+            self._child_item_type_ids.append(item_type.id)
         return item_type.id
 
     @rule(
         target=parent_items,
-        name=valid_name(),
-        description=valid_description(),
+        name=valid_name,
+        description=valid_description,
         user_id=users,
         location_id=locations,
     )
@@ -236,11 +231,8 @@ class InventorySystemStateMachine(RuleBasedStateMachine):
         assume(location_id in self.locations)
 
         # Find a parent item type
-        parent_item_types = [
-            it for it in self.item_types.values() if it.category == ItemCategory.PARENT
-        ]
-        assume(len(parent_item_types) > 0)
-        item_type_id = random.choice(parent_item_types).id
+        assume(self._parent_item_type_ids)
+        item_type_id = random.choice(self._parent_item_type_ids)
 
         parent_item = ParentItem(
             sku=name,
@@ -256,8 +248,8 @@ class InventorySystemStateMachine(RuleBasedStateMachine):
 
     @rule(
         target=child_items,
-        name=valid_name(),
-        description=valid_description(),
+        name=valid_name,
+        description=valid_description,
         user_id=users,
     )
     def create_child_item(self, name, description, user_id):
@@ -265,11 +257,8 @@ class InventorySystemStateMachine(RuleBasedStateMachine):
         assume(user_id in self.users)
 
         # Find a child item type
-        child_item_types = [
-            it for it in self.item_types.values() if it.category == ItemCategory.CHILD
-        ]
-        assume(len(child_item_types) > 0)
-        item_type_id = random.choice(child_item_types).id
+        assume(self._child_item_type_ids)
+        item_type_id = random.choice(self._child_item_type_ids)
 
         child_item = ChildItem(
             sku=name,
@@ -311,6 +300,7 @@ class InventorySystemStateMachine(RuleBasedStateMachine):
             notes=f"Moved from {old_location_id} to {new_location_id}",
         )
         self.move_history.append(move_record)
+        self._last_move[parent_item_id] = move_record
 
         # Move all assigned child items with parent
         for child_id, assigned_parent_id in self.child_assignments.items():
@@ -344,6 +334,7 @@ class InventorySystemStateMachine(RuleBasedStateMachine):
             notes=f"Assigned to parent {parent_item_id}",
         )
         self.assignment_history.append(assignment_record)
+        self._last_assignment[child_item_id] = assignment_record
 
     @rule(child_item_id=child_items, user_id=users)
     def unassign_child_item(self, child_item_id, user_id):
@@ -370,6 +361,7 @@ class InventorySystemStateMachine(RuleBasedStateMachine):
             notes="Unassigned from parent",
         )
         self.assignment_history.append(assignment_record)
+        self._last_assignment[child_item_id] = assignment_record
 
     # Invariants that must always hold
 
@@ -422,50 +414,26 @@ class InventorySystemStateMachine(RuleBasedStateMachine):
     @invariant()
     def move_history_consistency(self):
         """Move history should be consistent with current item locations."""
-        # Group moves by item
-        item_moves = {}
-        for move in self.move_history:
-            if move.parent_item_id not in item_moves:
-                item_moves[move.parent_item_id] = []
-            item_moves[move.parent_item_id].append(move)
-
         # Check that final location matches current location
-        for item_id, moves in item_moves.items():
+        for item_id, last_move in self._last_move.items():
             if item_id in self.parent_items:
-                # Sort moves by timestamp (using order added as proxy)
-                sorted_moves = sorted(moves, key=lambda m: self.move_history.index(m))
-                if sorted_moves:
-                    last_move = sorted_moves[-1]
-                    current_location = self.parent_items[item_id].current_location_id
-                    assert last_move.to_location_id == current_location, (
-                        f"Item {item_id} move history inconsistent: "
-                        f"last move to {last_move.to_location_id}, "
-                        f"current location {current_location}"
-                    )
+                current_location = self.parent_items[item_id].current_location_id
+                assert last_move.to_location_id == current_location, (
+                    f"Item {item_id} move history inconsistent: "
+                    f"last move to {last_move.to_location_id}, "
+                    f"current location {current_location}"
+                )
 
     @invariant()
     def assignment_history_consistency(self):
         """Assignment history should be consistent with current assignments."""
-        # Group assignments by child item
-        child_assignments_history = {}
-        for assignment in self.assignment_history:
-            if assignment.child_item_id not in child_assignments_history:
-                child_assignments_history[assignment.child_item_id] = []
-            child_assignments_history[assignment.child_item_id].append(assignment)
-
         # Check that final assignment matches current assignment
-        for child_id, assignments in child_assignments_history.items():
+        for child_id, last_assignment in self._last_assignment.items():
             if child_id in self.child_items:
-                # Sort assignments by order added
-                sorted_assignments = sorted(
-                    assignments, key=lambda a: self.assignment_history.index(a)
-                )
-                if sorted_assignments:
-                    last_assignment = sorted_assignments[-1]
-                    current_parent = self.child_items[child_id].parent_item_id
-                    assert (
-                        last_assignment.to_parent_item_id == current_parent
-                    ), f"Child {child_id} assignment history inconsistent"
+                current_parent = self.child_items[child_id].parent_item_id
+                assert (
+                    last_assignment.to_parent_item_id == current_parent
+                ), f"Child {child_id} assignment history inconsistent"
 
     @invariant()
     def referential_integrity(self):
@@ -596,14 +564,20 @@ class TestEndToEndWorkflows:
                 }
             )
 
+        # Group moves by item in one pass, then order each group by its
+        # timestamp; timestamps are the move's index, so they never tie
+        moves_by_item = {}
+        for move in move_history:
+            moves_by_item.setdefault(move["item_id"], []).append(move)
+        for item_moves in moves_by_item.values():
+            item_moves.sort(key=lambda m: m["timestamp"])
+
         # Verify consistency
         for item_id, item_data in items.items():
-            # Find all moves for this item
-            item_moves = [m for m in move_history if m["item_id"] == item_id]
+            item_moves = moves_by_item.get(item_id)
 
             if item_moves:
-                # Sort by timestamp and verify final location
-                item_moves.sort(key=lambda m: m["timestamp"])
+                # Verify final location
                 last_move = item_moves[-1]
                 assert (
                     item_data["current_location"] == last_move["to_location"]
@@ -723,18 +697,18 @@ class TestEndToEndWorkflows:
     @given(
         operations=st.lists(
             st.one_of(
-                st.tuples(st.just("create_item"), valid_name(), valid_uuid_string()),
+                st.tuples(st.just("create_item"), valid_name, valid_uuid_string),
                 st.tuples(
                     st.just("move_item"),
                     st.integers(min_value=0, max_value=9),
-                    valid_uuid_string(),
+                    valid_uuid_string,
                 ),
                 st.tuples(
                     st.just("assign_child"),
                     st.integers(min_value=0, max_value=9),
                     st.integers(min_value=0, max_value=9),
                 ),
-                st.tuples(st.just("create_location"), valid_name()),
+                st.tuples(st.just("create_location"), valid_name),
             ),
             min_size=5,
             max_size=20,